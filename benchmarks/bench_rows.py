@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+import pyarrow
+from google.cloud.bigquery.table import Row
+
+from bq_guard.bq.jobs import batch_to_rows, write_csv_batches
+
+COLUMN_TYPES = ["int", "float", "str", "bool", "ts"]
+
+
+def _make_columns(rows: int, width: int) -> Dict[str, List[Any]]:
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    data: Dict[str, List[Any]] = {}
+    for index in range(width):
+        kind = COLUMN_TYPES[index % len(COLUMN_TYPES)]
+        name = f"c{index}_{kind}"
+        if kind == "int":
+            values: List[Any] = list(range(rows))
+        elif kind == "float":
+            values = [i * 0.5 for i in range(rows)]
+        elif kind == "str":
+            values = [f"value-{i}" for i in range(rows)]
+        elif kind == "bool":
+            values = [i % 2 == 0 for i in range(rows)]
+        else:
+            values = [base + timedelta(seconds=i) for i in range(rows)]
+        data[name] = [None if i % 17 == 0 else value for i, value in enumerate(values)]
+    return data
+
+
+def _legacy_json(rows: List[Row], columns: List[str]) -> None:
+    json.dumps([[row.get(col) for col in columns] for row in rows], default=str)
+
+
+def _legacy_csv(rows: List[Row], columns: List[str]) -> None:
+    writer = csv.writer(io.StringIO())
+    for row in rows:
+        writer.writerow([row.get(col) for col in columns])
+
+
+def _arrow_json(batch: pyarrow.RecordBatch) -> None:
+    json.dumps(batch_to_rows(batch))
+
+
+def _arrow_csv(batch: pyarrow.RecordBatch) -> None:
+    write_csv_batches(csv.writer(io.StringIO()), [batch])
+
+
+def _cells_per_sec(func: Callable[[], None], cells: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return cells / best if best > 0 else float("inf")
+
+
+def run(rows: int, width: int, repeat: int) -> Dict[str, Any]:
+    data = _make_columns(rows, width)
+    columns = list(data)
+    field_to_index = {name: index for index, name in enumerate(columns)}
+    legacy_rows = [Row(values, field_to_index) for values in zip(*data.values())]
+    batch = pyarrow.RecordBatch.from_pydict(data)
+    cells = rows * width
+    results = {
+        "legacy_json": _cells_per_sec(lambda: _legacy_json(legacy_rows, columns), cells, repeat),
+        "arrow_json": _cells_per_sec(lambda: _arrow_json(batch), cells, repeat),
+        "legacy_csv": _cells_per_sec(lambda: _legacy_csv(legacy_rows, columns), cells, repeat),
+        "arrow_csv": _cells_per_sec(lambda: _arrow_csv(batch), cells, repeat),
+    }
+    return {"rows": rows, "width": width, "cells_per_sec": {k: round(v) for k, v in results.items()}}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare row materialization throughput.")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--width", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.width, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+from . import bench_rows
+
+DEFAULT_THRESHOLD = 0.25
+# Slowdowns smaller than this are treated as timer noise.
+MIN_DELTA_S = 0.001
+
+# Case name -> allowed slowdown ratio before it counts as a regression.
+THRESHOLDS: Dict[str, float] = {
+    "history_append": 0.5,
+}
+
+Case = Tuple[str, Callable[[], Any], int, str]
+
+
+def _isolate(root: str, fake: Dict[str, Any]) -> None:
+    os.environ["XDG_CONFIG_HOME"] = os.path.join(root, "config")
+    os.environ["XDG_CACHE_HOME"] = os.path.join(root, "cache")
+    os.environ["XDG_STATE_HOME"] = os.path.join(root, "state")
+    config_dir = os.path.join(root, "config", "bq_guard")
+    os.makedirs(config_dir, exist_ok=True)
+    app = {
+        "default_project": "bench-project",
+        "default_location": "US",
+        "backend": {"type": "fake", "fake": fake},
+    }
+    with open(os.path.join(config_dir, "config.yaml"), "w", encoding="utf-8") as handle:
+        yaml.safe_dump({"app": app}, handle, sort_keys=False)
+
+
+def _make_sql(size: int) -> str:
+    clause = "SELECT a.id, b.value FROM `p.d.events` a JOIN `p.d.users` b ON a.id = b.id WHERE event_date = '2024-01-01'\n"
+    return (clause * (size // len(clause) + 1))[:size]
+
+
+def _timed(func: Callable[[], Any], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _cases(fake: Dict[str, Any], quick: bool) -> List[Case]:
+    from bq_guard import cli
+    from bq_guard.cache import TableMetaCache
+    from bq_guard.config import DEFAULT_CONFIG, get_cache_path
+    from bq_guard.history import append_history
+    from bq_guard.policy.checks import run_policy_checks
+    from bq_guard.policy.partition import enforce_partition_filters
+
+    sql = "SELECT id FROM `p.d.events` WHERE event_date = '2024-01-01'"
+    app = DEFAULT_CONFIG["app"]
+    cases: List[Case] = []
+
+    def cold_start() -> None:
+        subprocess.run(
+            [sys.executable, "-m", "bq_guard.cli"],
+            input='{"op": "ping"}\n',
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+    cases.append(("cold_start_ping", cold_start, 1, "op"))
+
+    def estimate_cold() -> None:
+        if os.path.exists(get_cache_path()):
+            os.remove(get_cache_path())
+        cli.handle_request({"op": "estimate", "sql": sql})
+
+    cases.append(("estimate_cold", estimate_cold, 1, "op"))
+    cases.append(("estimate_warm", lambda: cli.handle_request({"op": "estimate", "sql": sql}), 1, "op"))
+
+    for label, size in [("10kb", 10 * 1024), ("100kb", 100 * 1024), ("1mb", 1024 * 1024)]:
+        big_sql = _make_sql(size)
+
+        def policy(big_sql: str = big_sql) -> None:
+            run_policy_checks(big_sql, 0, app["policy"], app["limits"])
+            enforce_partition_filters(
+                big_sql,
+                ["p.d.events"],
+                {"p.d.events": {"partition_type": "time", "partition_key": "event_date"}},
+                [],
+                True,
+            )
+
+        cases.append((f"policy_checks_{label}", policy, size, "byte"))
+
+    script = "".join(
+        f"SELECT id, v{index} FROM `p.d.events` WHERE event_date = '2024-01-01';\n" for index in range(1500)
+    )
+    cli.handle_request({"op": "lint", "sql": script})
+    cases.append(
+        (
+            "lint_warm_100kb",
+            lambda: cli.handle_request({"op": "lint", "sql": script + "SELECT 1"}),
+            len(script),
+            "byte",
+        )
+    )
+
+    sizes = [100, 10_000] if quick else [100, 10_000, 100_000]
+    for count in sizes:
+        cache = TableMetaCache(1)
+        cache.tables = {
+            f"p.d.t{index}": {"partition_type": "time", "partition_key": "event_date", "ingestion_time": False}
+            for index in range(count)
+        }
+        cases.append((f"cache_save_{count}", cache.save, count, "table"))
+        cases.append((f"cache_load_{count}", lambda: TableMetaCache(1), count, "table"))
+
+    entries = 200 if quick else 1000
+    entry = {"status": "ESTIMATED", "project": "p", "sql": sql, "dry_run_bytes": 1}
+
+    def history() -> None:
+        for _ in range(entries):
+            append_history(entry)
+
+    cases.append(("history_append", history, entries, "entry"))
+
+    job_id = cli.handle_request({"op": "execute", "sql": sql})["execute"]["job_id"]
+    width = fake["result_columns"]
+    page_rows = min(app["page_size"], fake["result_rows"])
+    cases.append(
+        (
+            "fetch_page",
+            lambda: cli.handle_request({"op": "fetch_page", "job_id": job_id}),
+            page_rows * width,
+            "cell",
+        )
+    )
+    out_path = os.path.join(tempfile.gettempdir(), "bq_guard_bench_export.csv")
+    cases.append(
+        (
+            "export_all",
+            lambda: cli.handle_request({"op": "export", "job_id": job_id, "mode": "all", "out_path": out_path}),
+            fake["result_rows"] * width,
+            "cell",
+        )
+    )
+    return cases
+
+
+def run(quick: bool = False, repeat: int = 5) -> Dict[str, Any]:
+    rows = 20_000 if quick else 100_000
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="bq_guard_bench_") as root:
+        fake = {
+            "result_rows": rows,
+            "result_columns": 20,
+            "tables": {
+                "p.d.events": {"bytes": 500 * 1024**3, "partition_type": "time", "partition_key": "event_date", "partitions": 365},
+            },
+        }
+        _isolate(root, fake)
+        for name, func, units, unit in _cases(fake, quick):
+            samples = _timed(func, repeat)
+            median = statistics.median(samples)
+            results[name] = {
+                "median_s": median,
+                "min_s": min(samples),
+                "max_s": max(samples),
+                "throughput": units / median if median > 0 else None,
+                "unit": f"{unit}/s",
+            }
+    rows_result = bench_rows.run(rows=5000 if quick else 20000, width=50, repeat=3)
+    cells = rows_result["rows"] * rows_result["width"]
+    for name, value in rows_result["cells_per_sec"].items():
+        results[f"rows_{name}"] = {"median_s": cells / value, "throughput": value, "unit": "cell/s"}
+    return {"meta": _meta(quick, repeat), "cases": results}
+
+
+def _meta(quick: bool, repeat: int) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=False
+        ).stdout.strip()
+    except FileNotFoundError:
+        commit = ""
+    return {
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": quick,
+        "repeat": repeat,
+        "ts": int(time.time()),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+    regressions = []
+    for name, result in current["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if not base or not base.get("median_s"):
+            continue
+        allowed = threshold if threshold is not None else THRESHOLDS.get(name, DEFAULT_THRESHOLD)
+        ratio = result["median_s"] / base["median_s"]
+        if ratio > 1 + allowed and result["median_s"] - base["median_s"] > MIN_DELTA_S:
+            regressions.append({"case": name, "ratio": round(ratio, 3), "allowed": allowed})
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the BQ Guard benchmark suite against a fake BigQuery client.")
+    parser.add_argument("--out", help="Write results JSON to this path.")
+    parser.add_argument("--baseline", help="Compare against a previous results JSON.")
+    parser.add_argument("--threshold", type=float, help="Override the per-case regression threshold (ratio).")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="Smaller data sizes for a fast smoke run.")
+    args = parser.parse_args()
+
+    results = run(quick=args.quick, repeat=args.repeat)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        regressions = compare(results, baseline, args.threshold)
+        for item in regressions:
+            sys.stderr.write(f"REGRESSION {item['case']}: {item['ratio']}x (allowed {1 + item['allowed']}x)\n")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 
 @dataclass
@@ -11,6 +11,10 @@ class Finding:
     message: str
     evidence: Optional[str] = None
     table: Optional[str] = None
+    line: Optional[int] = None
+    column: Optional[int] = None
+    end_line: Optional[int] = None
+    end_column: Optional[int] = None
 
 
 @dataclass
@@ -29,12 +33,17 @@ class EstimateResult:
     referenced_tables: List[str]
     findings: List[Finding]
     partition_summary: List[PartitionSummary]
+    statements: List[Dict[str, Any]] = field(default_factory=list)
+    units: List[Dict[str, Any]] = field(default_factory=list)
 
 
 @dataclass
 class ExecuteResult:
-    job_id: str
+    job_id: Optional[str]
     status: str
+    location: Optional[str] = None
+    ticket: Optional[str] = None
+    queue: Optional[Dict[str, Any]] = None
 
 
 @dataclass
@@ -42,3 +51,11 @@ class FetchResult:
     columns: List[str]
     rows: List[List[Any]]
     page_token: Optional[str] = None
+    all_columns: Optional[List[str]] = None
+    column_offset: Optional[int] = None
+    start_index: Optional[int] = None
+    next_start_index: Optional[int] = None
+    total_rows: Optional[int] = None
+    page_size: Optional[int] = None
+    streamed_rows: Optional[int] = None
+    rows_handle: Optional[Dict[str, Any]] = None
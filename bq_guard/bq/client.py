@@ -1,15 +1,103 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import json
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional, Protocol, Tuple
 
-from google.cloud import bigquery
+from ..tracing import span
+from .throttle import ApiGuard
 
+if TYPE_CHECKING:
+    from google.cloud import bigquery
+
+
+class Backend(Protocol):
+    def query(self, query: str, job_config: Any = None, location: Optional[str] = None) -> Any:
+        ...
+
+    def get_job(self, job_id: str, location: Optional[str] = None) -> Any:
+        ...
+
+    def get_table(self, table: str) -> Any:
+        ...
+
+    def get_dataset(self, dataset: str) -> Any:
+        ...
+
+
+class GuardedClient:
+    def __init__(self, client: Backend, guard: ApiGuard) -> None:
+        self._client = client
+        self.guard = guard
+
+    def query(self, query: str, job_config: Any = None, location: Optional[str] = None, **kwargs: Any) -> Any:
+        def call() -> Any:
+            return self._client.query(query, job_config=job_config, location=location, **kwargs)
+
+        if job_config is not None and job_config.dry_run and not kwargs:
+            config_key = json.dumps(job_config.to_api_repr(), sort_keys=True, default=str)
+            return self.guard.call("query", call, key=(query, location, config_key))
+        return self.guard.call("query", call, idempotent=False)
+
+    def get_job(self, job_id: str, location: Optional[str] = None, **kwargs: Any) -> Any:
+        key = None if kwargs else (job_id, location)
+        return self.guard.call("get_job", lambda: self._client.get_job(job_id, location=location, **kwargs), key=key)
+
+    def get_table(self, table: str, **kwargs: Any) -> Any:
+        key = None if kwargs else (str(table),)
+        return self.guard.call("get_table", lambda: self._client.get_table(table, **kwargs), key=key)
+
+    def get_dataset(self, dataset: str, **kwargs: Any) -> Any:
+        key = None if kwargs else (str(dataset),)
+        return self.guard.call("get_dataset", lambda: self._client.get_dataset(dataset, **kwargs), key=key)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+_clients: Dict[Tuple[Optional[str], str], GuardedClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(project: Optional[str], backend: Optional[Dict[str, Any]] = None) -> bigquery.Client:
+    settings = backend or {}
+    key = (project, json.dumps(settings, sort_keys=True, default=str))
+    with span("client"), _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = GuardedClient(
+                _create_client(project, settings),
+                ApiGuard(settings.get("rate_limits"), settings.get("retry")),
+            )
+            _clients[key] = client
+        return client
+
+
+def api_stats() -> Dict[str, Dict[str, int]]:
+    totals: Dict[str, Dict[str, int]] = {}
+    with _clients_lock:
+        guards = [client.guard for client in _clients.values()]
+    for guard in guards:
+        for method, counts in guard.snapshot().items():
+            merged = totals.setdefault(method, dict.fromkeys(counts, 0))
+            for counter, value in counts.items():
+                merged[counter] += value
+    return totals
+
+
+def _create_client(project: Optional[str], backend: Dict[str, Any]) -> Backend:
+    if backend.get("type") == "fake":
+        from .fake import FakeClient
+
+        return FakeClient(project, backend.get("fake") or {})
+    from google.cloud import bigquery
 
-def get_client(project: Optional[str]) -> bigquery.Client:
     return bigquery.Client(project=project)
 
 
 def build_job_config(use_query_cache: bool, labels: Dict[str, Any], dry_run: bool) -> bigquery.QueryJobConfig:
+    from google.cloud import bigquery
+
     config = bigquery.QueryJobConfig()
     config.dry_run = dry_run
     config.use_query_cache = use_query_cache
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import itertools
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+import pyarrow
+import pyarrow.compute as pc
+from google.api_core import exceptions as api_exceptions
+from google.cloud import bigquery
+
+from ..policy.script import statement_kind
+from ..policy.sql_sanitize import extract_tables, split_statement_spans
+
+_COLUMN_TYPES = ["INT64", "STRING", "FLOAT64", "TIMESTAMP"]
+_META_TABLES = re.compile(r"`([\w-]+\.[\w-]+)\.__TABLES__`")
+
+
+class FakeTable:
+    def __init__(
+        self,
+        table_id: str,
+        spec: Dict[str, Any],
+        default_bytes: int,
+        modified: datetime,
+        job: Optional["FakeJob"] = None,
+    ) -> None:
+        self.table_id = table_id
+        self.modified = modified
+        self.table_type = spec.get("type", "TABLE")
+        if job is not None:
+            self.schema = job.schema
+            self.num_rows = job.total_rows
+            self.num_bytes = job.total_rows * len(job.schema) * 8
+        else:
+            self.schema = [bigquery.SchemaField(name, kind) for name, kind in (spec.get("columns") or {}).items()]
+            self.num_rows = int(spec.get("rows", 0))
+            self.num_bytes = int(spec.get("bytes", default_bytes))
+        self.partitions = max(1, int(spec.get("partitions", 1)))
+        partition_type = spec.get("partition_type", "none")
+        self.partition_key = spec.get("partition_key")
+        self.time_partitioning = None
+        self.range_partitioning = None
+        if partition_type == "time":
+            field = None if spec.get("ingestion_time") else self.partition_key
+            self.time_partitioning = SimpleNamespace(field=field)
+        elif partition_type == "range":
+            self.range_partitioning = SimpleNamespace(field=self.partition_key)
+
+    def scanned_bytes(self, sql: str) -> int:
+        filter_key = self.partition_key
+        if self.time_partitioning is not None and self.time_partitioning.field is None:
+            filter_key = "_PARTITION(DATE|TIME)"
+        if filter_key and re.search(rf"\b{filter_key}\b", sql, re.IGNORECASE):
+            return self.num_bytes // self.partitions
+        return self.num_bytes
+
+
+class FakeRowIterator:
+    def __init__(
+        self,
+        job: "FakeJob",
+        page_size: Optional[int],
+        start: int,
+        max_results: Optional[int],
+        schema: Optional[List[bigquery.SchemaField]] = None,
+    ) -> None:
+        self._job = job
+        self._page_size = page_size or job.total_rows or 1
+        self._start = start
+        self._stop = job.total_rows if max_results is None else min(job.total_rows, start + max_results)
+        self.schema = job.schema if schema is None else schema
+        self.total_rows = job.total_rows
+        self.next_page_token: Optional[str] = None
+
+    def to_arrow_iterable(self, bqstorage_client: Any = None) -> Iterator[pyarrow.RecordBatch]:
+        offset = self._start
+        while offset < self._stop:
+            length = min(self._page_size, self._stop - offset)
+            self._job.backend.call("list_rows")
+            batch = self._job.backend.make_batch(self.schema, offset, length)
+            offset += length
+            self.next_page_token = str(offset) if offset < self._stop else None
+            yield batch
+
+    def to_arrow(self, create_bqstorage_client: bool = True) -> pyarrow.Table:
+        batches = list(self.to_arrow_iterable())
+        if not batches:
+            batches = [self._job.backend.make_batch(self.schema, 0, 0)]
+        return pyarrow.Table.from_batches(batches)
+
+
+class FakeMetaJob:
+    def __init__(self, rows: List[SimpleNamespace]) -> None:
+        self.rows = rows
+
+    def result(self, **_: Any) -> List[SimpleNamespace]:
+        return self.rows
+
+
+class FakeJob:
+    def __init__(self, backend: "FakeClient", job_id: str, sql: str, dry_run: bool) -> None:
+        self.backend = backend
+        self.job_id = job_id
+        self.query = sql
+        self.dry_run = dry_run
+        self.finishes = time.monotonic() + (0.0 if dry_run else backend.job_duration_ms / 1000.0)
+        self.error_result = None
+        self.ended = datetime.now(timezone.utc)
+        # Like BigQuery, only single query statements write to an anonymous destination table.
+        has_table = not dry_run and len(split_statement_spans(sql)) == 1 and statement_kind(sql) == "query"
+        self.destination = f"{backend.project}._anon.{job_id}" if has_table else None
+        self.referenced_tables = [
+            SimpleNamespace(project=p, dataset_id=d, table_id=t)
+            for p, d, t in (table.split(".") for table in sorted(extract_tables(sql)))
+        ]
+        self.total_bytes_processed = sum(
+            backend.get_table(".".join([ref.project, ref.dataset_id, ref.table_id]), record=False).scanned_bytes(sql)
+            for ref in self.referenced_tables
+        )
+        self.total_rows = 0 if dry_run else backend.result_rows
+        self.schema = [
+            bigquery.SchemaField(f"c{index}", _COLUMN_TYPES[index % len(_COLUMN_TYPES)])
+            for index in range(backend.result_columns)
+        ]
+
+    @property
+    def state(self) -> str:
+        return "DONE" if time.monotonic() >= self.finishes else "RUNNING"
+
+    def result(
+        self,
+        max_results: Optional[int] = None,
+        page_size: Optional[int] = None,
+        page_token: Optional[str] = None,
+        start_index: Optional[int] = None,
+        **_: Any,
+    ) -> FakeRowIterator:
+        remaining = self.finishes - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        return FakeRowIterator(self, page_size, int(page_token or start_index or 0), max_results)
+
+
+class FakeClient:
+    def __init__(self, project: Optional[str], settings: Dict[str, Any]) -> None:
+        self.project = project or "fake-project"
+        self.default_table_bytes = int(settings.get("default_table_bytes", 1024**3))
+        self.table_specs: Dict[str, Dict[str, Any]] = dict(settings.get("tables") or {})
+        self.dataset_locations: Dict[str, str] = {
+            dataset: spec["location"]
+            for dataset, spec in (settings.get("datasets") or {}).items()
+            if spec.get("location")
+        }
+        self.hidden_datasets = {
+            dataset for dataset, spec in (settings.get("datasets") or {}).items() if spec.get("tables_access") is False
+        }
+        self.meta_queries: List[Any] = []
+        self.strict_tables = bool(settings.get("strict_tables", False))
+        self.result_rows = int(settings.get("result_rows", 1000))
+        self.result_columns = max(1, int(settings.get("result_columns", 10)))
+        self.job_duration_ms = float(settings.get("job_duration_ms", 0))
+        self.latency_ms: Dict[str, float] = dict(settings.get("latency_ms") or {})
+        self.error_rate: Dict[str, float] = dict(settings.get("error_rate") or {})
+        self.error_code = int(settings.get("error_code", 503))
+        self.jobs: Dict[str, FakeJob] = {}
+        self.modified: Dict[str, datetime] = {}
+        self.known: Set[str] = set()
+        self._created = datetime.now(timezone.utc)
+        self.calls: Dict[str, int] = {}
+        self.in_flight: Dict[str, int] = {}
+        self.peak_in_flight: Dict[str, int] = {}
+        self._gates: Dict[str, threading.Event] = {}
+        self._random = random.Random(settings.get("seed", 0))
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def hold(self, method: str) -> threading.Event:
+        # Calls to `method` block until the returned event is set; lets tests line up concurrent calls.
+        gate = threading.Event()
+        with self._lock:
+            self._gates[method] = gate
+        return gate
+
+    def call(self, method: str) -> None:
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            fail = self._random.random() < float(self.error_rate.get(method, 0.0))
+            self.in_flight[method] = self.in_flight.get(method, 0) + 1
+            self.peak_in_flight[method] = max(self.peak_in_flight.get(method, 0), self.in_flight[method])
+            gate = self._gates.get(method)
+        try:
+            if gate is not None:
+                gate.wait()
+            delay = float(self.latency_ms.get(method, 0.0))
+            if delay:
+                time.sleep(delay / 1000.0)
+        finally:
+            with self._lock:
+                self.in_flight[method] -= 1
+        if fail:
+            raise api_exceptions.from_http_status(self.error_code, f"Injected {method} failure.")
+
+    def make_batch(self, schema: List[bigquery.SchemaField], offset: int, length: int) -> pyarrow.RecordBatch:
+        ids = pyarrow.array(range(offset, offset + length), pyarrow.int64())
+        arrays = []
+        for field in schema:
+            if field.field_type == "INT64":
+                arrays.append(ids)
+            elif field.field_type == "FLOAT64":
+                arrays.append(pc.divide(pc.cast(ids, pyarrow.float64()), 3.0))
+            elif field.field_type == "TIMESTAMP":
+                arrays.append(pc.cast(pc.multiply(ids, 1_000_000), pyarrow.timestamp("us", tz="UTC")))
+            else:
+                arrays.append(pyarrow.array([f"{field.name}-{row}" for row in range(offset, offset + length)]))
+        return pyarrow.RecordBatch.from_arrays(arrays, names=[field.name for field in schema])
+
+    def query(self, sql: str, job_config: Any = None, location: Optional[str] = None, **_: Any) -> FakeJob:
+        self.call("query")
+        meta_tables = _META_TABLES.search(sql)
+        if meta_tables:
+            self.meta_queries.append(job_config)
+            if meta_tables.group(1) in self.hidden_datasets:
+                raise api_exceptions.Forbidden(f"Access Denied: Table {meta_tables.group(1)}.__TABLES__")
+            return self.list_modified(meta_tables.group(1))
+        for table in extract_tables(sql):
+            dataset = table.rsplit(".", 1)[0]
+            expected = self.dataset_locations.get(dataset)
+            if location and expected and expected.lower() != location.lower():
+                project_id, dataset_id = dataset.split(".")
+                raise api_exceptions.NotFound(
+                    f"Not found: Dataset {project_id}:{dataset_id} was not found in location {location}"
+                )
+        dry_run = bool(getattr(job_config, "dry_run", False))
+        job = FakeJob(self, f"fake_job_{next(self._ids)}", sql, dry_run)
+        if not dry_run:
+            with self._lock:
+                self.jobs[job.job_id] = job
+        return job
+
+    def get_job(self, job_id: str, location: Optional[str] = None, **_: Any) -> FakeJob:
+        self.call("get_job")
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise api_exceptions.NotFound(f"Not found: Job {self.project}:{location}.{job_id}")
+        return job
+
+    def get_dataset(self, dataset_id: str, **_: Any) -> SimpleNamespace:
+        self.call("get_dataset")
+        return SimpleNamespace(dataset_id=dataset_id, location=self.dataset_locations.get(dataset_id, "US"))
+
+    def list_modified(self, dataset_id: str) -> FakeMetaJob:
+        prefix = f"{dataset_id}."
+        candidates = set(self.table_specs) | set(self.modified) | self.known
+        names = {table for table in candidates if table.startswith(prefix)}
+        return FakeMetaJob(
+            [
+                SimpleNamespace(
+                    table_id=table[len(prefix) :],
+                    last_modified_time=int(self.modified.get(table, self._created).timestamp() * 1000),
+                )
+                for table in sorted(names)
+            ]
+        )
+
+    def touch(self, table_id: str) -> None:
+        self.modified[table_id] = datetime.now(timezone.utc)
+
+    def get_table(self, table_id: str, record: bool = True, **_: Any) -> FakeTable:
+        if record:
+            self.call("get_table")
+        job = None
+        if table_id.split(".")[1:2] == ["_anon"]:
+            job = self.jobs.get(table_id.rsplit(".", 1)[-1])
+            if job is None or job.state != "DONE":
+                raise api_exceptions.NotFound(f"Not found: Table {table_id}")
+        spec = self.table_specs.get(table_id)
+        if spec is None:
+            if self.strict_tables:
+                raise api_exceptions.NotFound(f"Not found: Table {table_id}")
+            spec = {}
+        if job is None:
+            self.known.add(table_id)
+        return FakeTable(table_id, spec, self.default_table_bytes, self.modified.get(table_id, self._created), job)
+
+    def list_rows(
+        self,
+        table: Any,
+        selected_fields: Optional[List[bigquery.SchemaField]] = None,
+        start_index: Optional[int] = None,
+        max_results: Optional[int] = None,
+        page_size: Optional[int] = None,
+        **_: Any,
+    ) -> FakeRowIterator:
+        table_id = getattr(table, "table_id", table)
+        job = self.jobs.get(str(table_id).rsplit(".", 1)[-1])
+        if job is None or job.state != "DONE":
+            raise api_exceptions.NotFound(f"Not found: Table {table_id}")
+        return FakeRowIterator(job, page_size, start_index or 0, max_results, selected_fields)
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import base64
 import csv
-from typing import Any, Dict, List, Optional
-
-from google.cloud import bigquery
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from .client import build_job_config
 
+if TYPE_CHECKING:
+    from google.cloud import bigquery
+
 
 def dry_run_query(
     client: bigquery.Client,
@@ -19,6 +23,26 @@ def dry_run_query(
     return client.query(sql, job_config=job_config, location=location)
 
 
+def dry_run_many(
+    client: bigquery.Client,
+    statements: List[str],
+    location: Optional[str],
+    use_query_cache: bool,
+    labels: Dict[str, Any],
+    concurrency: int,
+) -> List[Tuple[Optional[bigquery.QueryJob], Optional[Exception]]]:
+    def run(sql: str) -> Tuple[Optional[bigquery.QueryJob], Optional[Exception]]:
+        try:
+            return dry_run_query(client, sql, location, use_query_cache, labels), None
+        except Exception as exc:
+            return None, exc
+
+    if len(statements) <= 1 or concurrency <= 1:
+        return [run(sql) for sql in statements]
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(statements))) as pool:
+        return list(pool.map(run, statements))
+
+
 def execute_query(
     client: bigquery.Client,
     sql: str,
@@ -30,6 +54,85 @@ def execute_query(
     return client.query(sql, job_config=job_config, location=location)
 
 
+def job_finished(client: bigquery.Client, job_id: str, location: Optional[str]) -> bool:
+    return client.get_job(job_id, location=location).state == "DONE"
+
+
+def reusable_job(client: bigquery.Client, job_id: str, location: Optional[str]) -> Optional[Dict[str, Any]]:
+    try:
+        job = client.get_job(job_id, location=location)
+        if job.state != "DONE" or job.error_result or job.destination is None or job.ended is None:
+            return None
+        # Anonymous destination tables expire after about a day; make sure this one is still there.
+        client.get_table(job.destination)
+        for ref in job.referenced_tables or []:
+            table = client.get_table(f"{ref.project}.{ref.dataset_id}.{ref.table_id}")
+            # External tables can change underneath without touching `modified`.
+            if getattr(table, "table_type", "TABLE") != "TABLE":
+                return None
+            if table.modified is None or table.modified > job.ended:
+                return None
+    except Exception:
+        return None
+    return {"job_id": job.job_id, "location": location, "executed_at": job.ended.isoformat()}
+
+
+def _json_safe(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json_safe(item) for item in value]
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def convert_column(column: Any) -> List[Any]:
+    import pyarrow
+    import pyarrow.compute as pc
+
+    kind = column.type
+    if pyarrow.types.is_floating(kind):
+        return pc.if_else(pc.is_finite(column), column, None).to_pylist()
+    if pyarrow.types.is_temporal(kind):
+        # Same text str() gave the Python values before: "2024-01-01 00:00:00+00:00", no all-zero fraction.
+        text = pc.cast(column, pyarrow.string())
+        text = pc.replace_substring_regex(text, r"\.0+(Z?)$", r"\1")
+        return pc.replace_substring_regex(text, r"Z$", "+00:00").to_pylist()
+    if pyarrow.types.is_decimal(kind):
+        # Arrow pads to the column scale and switches to exponents near zero; keep plain "1.5" / "0".
+        return [None if value is None else format(value.normalize(), "f") for value in column.to_pylist()]
+    if pyarrow.types.is_binary(kind) or pyarrow.types.is_large_binary(kind):
+        return [None if value is None else base64.b64encode(value).decode("ascii") for value in column.to_pylist()]
+    if pyarrow.types.is_nested(kind):
+        return [_json_safe(value) for value in column.to_pylist()]
+    return column.to_pylist()
+
+
+def batch_to_rows(batch: Any) -> List[List[Any]]:
+    if batch.num_columns == 0:
+        return [[] for _ in range(batch.num_rows)]
+    columns = [convert_column(batch.column(index)) for index in range(batch.num_columns)]
+    return list(map(list, zip(*columns)))
+
+
+def write_csv_batches(writer: Any, batches: Iterable[Any]) -> int:
+    total_rows = 0
+    for batch in batches:
+        if batch.num_rows == 0:
+            continue
+        columns = [convert_column(batch.column(index)) for index in range(batch.num_columns)]
+        writer.writerows(zip(*columns))
+        total_rows += batch.num_rows
+    return total_rows
+
+
 def fetch_preview_rows(
     client: bigquery.Client,
     job_id: str,
@@ -38,10 +141,9 @@ def fetch_preview_rows(
 ) -> Dict[str, Any]:
     job = client.get_job(job_id, location=location)
     result_iter = job.result(max_results=max_rows)
-    rows = list(result_iter)
+    table = result_iter.to_arrow(create_bqstorage_client=False)
     columns = [field.name for field in result_iter.schema]
-    data = [[row.get(col) for col in columns] for row in rows]
-    return {"columns": columns, "rows": data}
+    return {"columns": columns, "rows": batch_to_rows(table)}
 
 
 def fetch_page_rows(
@@ -53,13 +155,122 @@ def fetch_page_rows(
 ) -> Dict[str, Any]:
     job = client.get_job(job_id, location=location)
     result_iter = job.result(page_size=page_size, page_token=page_token)
-    page = next(result_iter.pages)
-    rows = list(page)
+    batch = next(iter(result_iter.to_arrow_iterable()), None)
     columns = [field.name for field in result_iter.schema]
-    data = [[row.get(col) for col in columns] for row in rows]
+    data = batch_to_rows(batch) if batch is not None else []
     return {"columns": columns, "rows": data, "page_token": result_iter.next_page_token}
 
 
+def _project_fields(
+    schema: List[Any], columns: Optional[List[str]], column_offset: int, column_count: Optional[int]
+) -> List[Any]:
+    if columns:
+        by_name = {field.name: field for field in schema}
+        return [by_name[name] for name in columns if name in by_name]
+    stop = None if column_count is None else column_offset + column_count
+    return schema[column_offset:stop]
+
+
+def page_rows(table: Any, selected: List[Any], target_bytes: int, min_rows: int, max_rows: int) -> int:
+    from .metadata import column_sizes, estimated_width
+
+    num_rows = int(table.num_rows or 0)
+    num_bytes = int(table.num_bytes or 0)
+    if num_rows and num_bytes:
+        sizes = {column["name"]: column["bytes"] for column in column_sizes(list(table.schema), num_rows, num_bytes)}
+        width = sum(sizes.get(field.name, 0) for field in selected) / num_rows
+    else:
+        width = estimated_width(selected)
+    return max(min_rows, min(max_rows, int(target_bytes / max(width, 1.0))))
+
+
+def _result_window(
+    job: Any,
+    start_index: int,
+    max_rows: int,
+    columns: Optional[List[str]],
+    column_offset: int,
+    column_count: Optional[int],
+) -> Dict[str, Any]:
+    result_iter = job.result(start_index=start_index, max_results=max_rows)
+    schema = list(result_iter.schema)
+    selected = _project_fields(schema, columns, column_offset, column_count)
+    table = result_iter.to_arrow(create_bqstorage_client=False)
+    rows = batch_to_rows(table.select([field.name for field in selected])) if selected else []
+    total_rows = result_iter.total_rows
+    end = start_index + len(rows)
+    return {
+        "columns": [field.name for field in selected],
+        "rows": rows,
+        "all_columns": [field.name for field in schema],
+        "column_offset": schema.index(selected[0]) if selected else column_offset,
+        "start_index": start_index,
+        "next_start_index": end if total_rows is not None and end < total_rows else None,
+        "total_rows": total_rows,
+        "page_size": max_rows,
+        "streamed_rows": None,
+    }
+
+
+def fetch_window_rows(
+    client: bigquery.Client,
+    job_id: str,
+    location: Optional[str],
+    start_index: int,
+    max_rows: Optional[int],
+    columns: Optional[List[str]] = None,
+    column_offset: int = 0,
+    column_count: Optional[int] = None,
+    paging: Optional[Dict[str, Any]] = None,
+    on_rows: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    job = client.get_job(job_id, location=location)
+    # The anonymous destination table only appears once the job is done.
+    job.result(max_results=0)
+    if job.destination is None:
+        # Script parents and DML/DDL jobs have no destination table to project from.
+        return _result_window(job, start_index, max_rows or 1000, columns, column_offset, column_count)
+    table = client.get_table(job.destination)
+    schema = list(table.schema)
+    selected = _project_fields(schema, columns, column_offset, column_count)
+    chunk_rows = None
+    if paging is not None:
+        if max_rows is None:
+            max_rows = page_rows(table, selected, paging["target_bytes"], paging["min_rows"], paging["max_rows"])
+        chunk_rows = page_rows(table, selected, paging["chunk_bytes"], 1, max_rows)
+    max_rows = max_rows or 1000
+    result_iter = client.list_rows(
+        table,
+        selected_fields=selected,
+        start_index=start_index,
+        max_results=max_rows,
+        page_size=chunk_rows if on_rows is not None and chunk_rows else max_rows,
+    )
+    data: List[List[Any]] = []
+    fetched = 0
+    for batch in result_iter.to_arrow_iterable():
+        rows = batch_to_rows(batch)
+        if on_rows is not None:
+            # Each API page goes out as soon as it lands, so the grid fills while later chunks download.
+            on_rows({"offset": start_index + fetched, "columns": [field.name for field in selected], "rows": rows})
+        else:
+            data.extend(rows)
+        fetched += len(rows)
+    total_rows = result_iter.total_rows if result_iter.total_rows is not None else table.num_rows
+    end = start_index + fetched
+    return {
+        "columns": [field.name for field in selected],
+        "rows": data,
+        "all_columns": [field.name for field in schema],
+        "column_offset": schema.index(selected[0]) if selected else column_offset,
+        "start_index": start_index,
+        "next_start_index": end if total_rows is not None and end < total_rows else None,
+        "total_rows": total_rows,
+        "page_size": max_rows,
+        "streamed_rows": fetched if on_rows is not None else None,
+    }
+
+
 def export_rows(
     client: bigquery.Client,
     job_id: str,
@@ -69,25 +280,12 @@ def export_rows(
     page_size: int,
 ) -> int:
     job = client.get_job(job_id, location=location)
-    total_rows = 0
     with open(out_path, "w", encoding="utf-8", newline="") as handle:
-        writer = None
         if mode == "preview":
             result_iter = job.result(max_results=page_size)
-            rows = list(result_iter)
-            columns = [field.name for field in result_iter.schema]
-            writer = csv.writer(handle)
-            writer.writerow(columns)
-            for row in rows:
-                writer.writerow([row.get(col) for col in columns])
-                total_rows += 1
         else:
             result_iter = job.result(page_size=page_size)
-            columns = [field.name for field in result_iter.schema]
-            writer = csv.writer(handle)
-            writer.writerow(columns)
-            for page in result_iter.pages:
-                for row in page:
-                    writer.writerow([row.get(col) for col in columns])
-                    total_rows += 1
-    return total_rows
+        columns = [field.name for field in result_iter.schema]
+        writer = csv.writer(handle)
+        writer.writerow(columns)
+        return write_csv_batches(writer, result_iter.to_arrow_iterable())
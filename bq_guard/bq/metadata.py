@@ -1,11 +1,87 @@
 from __future__ import annotations
 
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-from google.cloud import bigquery
+if TYPE_CHECKING:
+    from google.cloud import bigquery
 
+# Marks the freshness check's query job so it is easy to tell apart in the project's job history.
+FRESHNESS_LABEL = {"bq_guard_job": "freshness_check"}
+FRESHNESS_JOB_PREFIX = "bq_guard_freshness_"
 
-def fetch_table_metadata(client: bigquery.Client, table_id: str) -> Optional[Dict[str, str]]:
+# Logical bytes per value as BigQuery bills them; None marks variable-length types.
+_FIXED_SIZES = {
+    "INT64": 8,
+    "INTEGER": 8,
+    "FLOAT64": 8,
+    "FLOAT": 8,
+    "NUMERIC": 16,
+    "BIGNUMERIC": 32,
+    "BOOL": 1,
+    "BOOLEAN": 1,
+    "DATE": 8,
+    "DATETIME": 8,
+    "TIME": 8,
+    "TIMESTAMP": 8,
+    "INTERVAL": 16,
+}
+
+
+def _fixed_size(field: Any) -> Optional[int]:
+    if field.mode == "REPEATED":
+        return None
+    if field.field_type in {"RECORD", "STRUCT"}:
+        sizes = [_fixed_size(child) for child in field.fields]
+        return None if any(size is None for size in sizes) else sum(sizes)
+    return _FIXED_SIZES.get(field.field_type)
+
+
+def estimated_width(schema: List[Any], variable_bytes: int = 32) -> float:
+    sizes = [_fixed_size(field) for field in schema]
+    return float(sum(variable_bytes if size is None else size for size in sizes))
+
+
+def column_sizes(schema: List[Any], num_rows: int, num_bytes: int) -> List[Dict[str, Any]]:
+    fixed = {field.name: _fixed_size(field) for field in schema}
+    fixed_bytes = sum(size * num_rows for size in fixed.values() if size is not None)
+    variable = [name for name, size in fixed.items() if size is None]
+    # Variable-length columns share whatever the fixed-width columns leave of the table size.
+    share = max(0, num_bytes - fixed_bytes) // len(variable) if variable else 0
+    return [
+        {
+            "name": field.name,
+            "type": field.field_type,
+            "bytes": share if fixed[field.name] is None else fixed[field.name] * num_rows,
+        }
+        for field in schema
+    ]
+
+
+def fetch_dataset_location(client: bigquery.Client, dataset_id: str) -> Optional[str]:
+    try:
+        dataset = client.get_dataset(dataset_id)
+    except Exception:
+        return None
+    return dataset.location or None
+
+
+def fetch_modified_times(
+    client: bigquery.Client, dataset_id: str, location: Optional[str], labels: Dict[str, Any]
+) -> Optional[Dict[str, int]]:
+    from .client import build_job_config
+
+    # __TABLES__ is a free metadata read that carries last_modified_time, which INFORMATION_SCHEMA.TABLES lacks.
+    sql = f"SELECT table_id, last_modified_time FROM `{dataset_id}.__TABLES__`"
+    job_config = build_job_config(use_query_cache=False, labels={**labels, **FRESHNESS_LABEL}, dry_run=False)
+    try:
+        job = client.query(sql, job_config=job_config, location=location, job_id_prefix=FRESHNESS_JOB_PREFIX)
+        rows = job.result()
+    except Exception:
+        return None
+    return {f"{dataset_id}.{row.table_id}": int(row.last_modified_time) for row in rows}
+
+
+def fetch_table_metadata(client: bigquery.Client, table_id: str) -> Optional[Dict[str, Any]]:
     try:
         table = client.get_table(table_id)
     except Exception:
@@ -22,8 +98,14 @@ def fetch_table_metadata(client: bigquery.Client, table_id: str) -> Optional[Dic
     if table.range_partitioning:
         partition_type = "range"
         partition_key = table.range_partitioning.field
+    num_rows = int(table.num_rows or 0)
+    num_bytes = int(table.num_bytes or 0)
     return {
+        "last_modified_ms": int(table.modified.timestamp() * 1000) if table.modified else None,
         "partition_type": partition_type,
         "partition_key": partition_key,
         "ingestion_time": ingestion_time,
+        "num_rows": num_rows,
+        "num_bytes": num_bytes,
+        "columns": column_sizes(list(table.schema or []), num_rows, num_bytes),
     }
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_RETRYABLE_CODES = {429, 500, 502, 503, 504}
+_RATE_LIMIT_REASONS = {"rateLimitExceeded", "backendError"}
+_COUNTERS = ("calls", "coalesced", "throttled", "retried", "failed")
+
+
+def is_retryable(exc: BaseException, idempotent: bool = True) -> bool:
+    code = getattr(exc, "code", None)
+    reasons = {error.get("reason") for error in getattr(exc, "errors", None) or [] if isinstance(error, dict)}
+    if code == 429 or (code == 403 and "rateLimitExceeded" in reasons):
+        return True
+    if not idempotent:
+        return False
+    return code in _RETRYABLE_CODES or bool(reasons & _RATE_LIMIT_REASONS)
+
+
+class _Flight:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> Tuple[T, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if flight is None:
+                flight = _Flight()
+                self._flights[key] = flight
+            else:
+                flight.waiters += 1
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+        try:
+            flight.result = fn()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+        return flight.result, False
+
+    def waiting(self) -> int:
+        with self._lock:
+            return sum(flight.waiters for flight in self._flights.values())
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                delay = (1.0 - self._tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
+
+
+class ApiGuard:
+    def __init__(
+        self,
+        rate_limits: Optional[Dict[str, Dict[str, float]]] = None,
+        retry: Optional[Dict[str, float]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        retry = retry or {}
+        self.attempts = max(1, int(retry.get("attempts", 4)))
+        self.base_s = float(retry.get("base_ms", 250)) / 1000.0
+        self.cap_s = float(retry.get("cap_ms", 8000)) / 1000.0
+        self._buckets = {
+            method: TokenBucket(limit["rate"], limit.get("burst", limit["rate"]))
+            for method, limit in (rate_limits or {}).items()
+            if limit and float(limit.get("rate") or 0) > 0
+        }
+        self._flight = SingleFlight()
+        self._sleep = sleep
+        self._random = rng or random.Random()
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, method: str, counter: str) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(method, dict.fromkeys(_COUNTERS, 0))
+            counts[counter] += 1
+
+    def call(
+        self,
+        method: str,
+        fn: Callable[[], T],
+        key: Optional[Tuple[Any, ...]] = None,
+        idempotent: bool = True,
+    ) -> T:
+        if key is None:
+            return self._attempt(method, fn, idempotent)
+        result, shared = self._flight.do((method,) + key, lambda: self._attempt(method, fn, idempotent))
+        if shared:
+            self._count(method, "coalesced")
+        return result
+
+    def _attempt(self, method: str, fn: Callable[[], T], idempotent: bool) -> T:
+        bucket = self._buckets.get(method)
+        for attempt in range(self.attempts):
+            if bucket is not None and bucket.acquire() > 0:
+                self._count(method, "throttled")
+            self._count(method, "calls")
+            try:
+                return fn()
+            except Exception as exc:
+                if attempt + 1 >= self.attempts or not is_retryable(exc, idempotent):
+                    self._count(method, "failed")
+                    raise
+                self._count(method, "retried")
+                self._sleep(self._random.uniform(0, min(self.cap_s, self.base_s * 2**attempt)))
+        raise AssertionError("unreachable")
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {method: dict(counts) for method, counts in self._counts.items()}
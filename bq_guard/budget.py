@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .config import get_history_path
+from .history import HistoryFollower, entry_time
+from .policy.checks import bytes_human
+from .policy.types import Finding
+
+WINDOWS = {"hourly": 3600, "daily": 86400}
+_BUCKET_S = 60
+
+LedgerKey = Tuple[Optional[str], Optional[str]]
+
+
+class RollingWindow:
+    def __init__(self, seconds: int) -> None:
+        self.seconds = seconds
+        self.total = 0
+        self._buckets: Deque[List[int]] = deque()
+
+    def add(self, ts: float, num_bytes: int) -> None:
+        bucket = int(ts) // _BUCKET_S * _BUCKET_S
+        if self._buckets and self._buckets[-1][0] == bucket:
+            self._buckets[-1][1] += num_bytes
+        elif self._buckets and self._buckets[-1][0] > bucket:
+            # History lines can land slightly out of order across processes; fold them into the newest bucket.
+            self._buckets[-1][1] += num_bytes
+        else:
+            self._buckets.append([bucket, num_bytes])
+        self.total += num_bytes
+
+    def used(self, now: float) -> int:
+        cutoff = now - self.seconds
+        while self._buckets and self._buckets[0][0] + _BUCKET_S <= cutoff:
+            self.total -= self._buckets.popleft()[1]
+        return self.total
+
+
+class BudgetLedger:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._windows: Dict[LedgerKey, Dict[str, RollingWindow]] = {}
+        self._reviewed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._follower = HistoryFollower(path, self._add_entry, self._windows.clear)
+
+    def _add_entry(self, entry: Dict[str, Any]) -> None:
+        if entry.get("status") != "EXECUTED" or not entry.get("dry_run_bytes"):
+            return
+        executed_at = entry_time(entry)
+        if executed_at is None or executed_at.timestamp() < time.time() - max(WINDOWS.values()):
+            return
+        self.add((entry.get("user"), entry.get("project")), executed_at.timestamp(), int(entry["dry_run_bytes"]))
+
+    def add(self, key: LedgerKey, ts: float, num_bytes: int) -> None:
+        with self._lock:
+            windows = self._windows.get(key)
+            if windows is None:
+                windows = {name: RollingWindow(seconds) for name, seconds in WINDOWS.items()}
+                self._windows[key] = windows
+            for window in windows.values():
+                window.add(ts, num_bytes)
+
+    def note_review(self, sql_key: str, num_bytes: int, limit: int = 256) -> None:
+        with self._lock:
+            self._reviewed.pop(sql_key, None)
+            self._reviewed[sql_key] = num_bytes
+            while len(self._reviewed) > limit:
+                del self._reviewed[next(iter(self._reviewed))]
+
+    def reviewed_bytes(self, sql_key: str) -> Optional[int]:
+        return self._reviewed.get(sql_key)
+
+    def usage(self, key: LedgerKey) -> Dict[str, int]:
+        self._follower.refresh()
+        now = time.time()
+        with self._lock:
+            windows = self._windows.get(key)
+            if windows is None:
+                return dict.fromkeys(WINDOWS, 0)
+            return {name: window.used(now) for name, window in windows.items()}
+
+
+_ledgers: Dict[str, BudgetLedger] = {}
+_ledgers_lock = threading.Lock()
+
+
+def load_ledger() -> BudgetLedger:
+    path = get_history_path()
+    with _ledgers_lock:
+        ledger = _ledgers.get(path)
+        if ledger is None:
+            ledger = BudgetLedger(path)
+            _ledgers[path] = ledger
+        return ledger
+
+
+def check_budget(
+    key: LedgerKey, bytes_processed: int, budget: Dict[str, Any]
+) -> Tuple[List[Finding], Dict[str, Dict[str, Any]]]:
+    usage = load_ledger().usage(key)
+    findings: List[Finding] = []
+    summary: Dict[str, Dict[str, Any]] = {}
+    for name, seconds in WINDOWS.items():
+        limit = budget.get(f"{name}_bytes")
+        summary[name] = {"used": usage[name], "limit": limit, "window_s": seconds}
+        if not limit:
+            continue
+        projected = usage[name] + bytes_processed
+        detail = (
+            f"{name.capitalize()} budget: {bytes_human(usage[name])} used of {bytes_human(limit)}; "
+            f"this query would bring it to {bytes_human(projected)}."
+        )
+        if projected > limit:
+            findings.append(Finding(severity="ERROR", code="BUDGET_EXCEEDED", message=detail, evidence=str(projected)))
+        elif projected >= limit * float(budget.get("warn_ratio", 0.8)):
+            findings.append(Finding(severity="WARN", code="BUDGET_NEAR", message=detail, evidence=str(projected)))
+    return findings, summary
@@ -2,10 +2,15 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from .config import get_cache_path
+from .tracing import span
+
+# Bumped in code whenever the entry layout changes; the user's schema_version can only force extra resets.
+CACHE_FORMAT = 2
 
 
 class TableMetaCache:
@@ -13,25 +18,48 @@ class TableMetaCache:
         self.schema_version = schema_version
         self.path = get_cache_path()
         self.tables: Dict[str, Dict[str, Any]] = {}
+        self.datasets: Dict[str, Dict[str, Any]] = {}
+        self.checked: Dict[str, int] = {}
         self._load()
 
     def _load(self) -> None:
+        with span("cache_load"):
+            self._read()
+
+    def _read(self) -> None:
         try:
             with open(self.path, "r", encoding="utf-8") as handle:
                 data = json.load(handle)
-            if data.get("version") != self.schema_version:
+            if data.get("version") != self.schema_version or data.get("format") != CACHE_FORMAT:
                 return
             self.tables = data.get("tables", {})
+            self.datasets = data.get("datasets", {})
+            self.checked = data.get("checked", {})
         except FileNotFoundError:
             return
         except Exception:
             return
 
     def save(self) -> None:
+        with span("cache_save"):
+            self._write()
+
+    def _write(self) -> None:
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
         try:
             os.makedirs(os.path.dirname(self.path), exist_ok=True)
-            with open(self.path, "w", encoding="utf-8") as handle:
-                json.dump({"version": self.schema_version, "tables": self.tables}, handle)
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump(
+                    {
+                        "version": self.schema_version,
+                        "format": CACHE_FORMAT,
+                        "tables": self.tables,
+                        "datasets": self.datasets,
+                        "checked": self.checked,
+                    },
+                    handle,
+                )
+            os.replace(tmp_path, self.path)
         except Exception:
             return
 
@@ -45,3 +73,59 @@ class TableMetaCache:
 
     def missing(self, tables: List[str]) -> List[str]:
         return [table for table in tables if table not in self.tables]
+
+    def stale_datasets(self, datasets: List[str], interval_s: int) -> List[str]:
+        now = time.time()
+        return [dataset for dataset in datasets if now - self.checked.get(dataset, 0) >= interval_s]
+
+    def apply_modified(self, dataset: str, modified: Dict[str, int]) -> List[str]:
+        changed = []
+        prefix = f"{dataset}."
+        for table in [table for table in self.tables if table.startswith(prefix)]:
+            meta = self.tables[table]
+            stamp = modified.get(table)
+            if stamp is None:
+                changed.append(table)
+            elif meta.get("last_modified_ms") is not None:
+                if stamp != meta["last_modified_ms"]:
+                    changed.append(table)
+            elif stamp > int(meta.get("last_seen_ts") or 0) * 1000:
+                changed.append(table)
+        for table in changed:
+            del self.tables[table]
+        self.mark_checked(dataset)
+        return changed
+
+    def mark_checked(self, dataset: str) -> None:
+        self.checked[dataset] = int(time.time())
+
+    def set_dataset(self, dataset: str, location: Optional[str]) -> None:
+        # A None location records a failed lookup so it is not retried on every request.
+        self.datasets[dataset] = {"location": location, "last_seen_ts": int(time.time())}
+
+    def missing_datasets(self, datasets: List[str], retry_s: int) -> List[str]:
+        now = time.time()
+        return [
+            dataset
+            for dataset in datasets
+            if dataset not in self.datasets
+            or (self.datasets[dataset]["location"] is None and now - self.datasets[dataset]["last_seen_ts"] >= retry_s)
+        ]
+
+
+_shared: Dict[Tuple[str, int], Tuple[Optional[Tuple[int, int, int]], TableMetaCache]] = {}
+
+
+def load_shared_cache(schema_version: int) -> TableMetaCache:
+    path = get_cache_path()
+    try:
+        stat = os.stat(path)
+        stamp: Optional[Tuple[int, int, int]] = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        stamp = None
+    cached = _shared.get((path, schema_version))
+    if cached and cached[0] == stamp:
+        return cached[1]
+    cache = TableMetaCache(schema_version)
+    _shared[(path, schema_version)] = (stamp, cache)
+    return cache
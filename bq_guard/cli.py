@@ -1,32 +1,47 @@
 from __future__ import annotations
 
+import argparse
 import json
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict
-from typing import Any, Dict, List, Optional
-
-from google.cloud import bigquery
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from .app_model import EstimateResult, ExecuteResult, FetchResult
-from .bq.client import get_client
-from .bq.jobs import dry_run_query, execute_query, export_rows, fetch_page_rows, fetch_preview_rows
-from .bq.metadata import fetch_table_metadata
-from .cache import TableMetaCache
-from .config import ConfigLoader, get_history_path, get_cache_path
-from .gcloud import get_default_location, get_default_project
+from .budget import check_budget, load_ledger
+from .bq.client import api_stats, get_client
+from .bq.jobs import (
+    dry_run_many,
+    dry_run_query,
+    execute_query,
+    export_rows,
+    fetch_page_rows,
+    fetch_preview_rows,
+    fetch_window_rows,
+    job_finished,
+    reusable_job,
+)
+from .bq.metadata import fetch_dataset_location, fetch_modified_times, fetch_table_metadata
+from .cache import TableMetaCache, load_shared_cache
+from .config import ConfigLoader, get_history_path, get_cache_path, get_socket_path, get_trace_path
+from .gcloud import get_default_account, get_default_location, get_default_project
 from .history import append_history
-from .policy.checks import run_policy_checks
+from .policy.checks import bytes_human, check_bytes, check_multi_statement, run_policy_checks
+from .policy.lint import LINTER, merge_partition_summary
 from .policy.partition import enforce_partition_filters
-from .policy.sql_sanitize import extract_tables
-
+from .policy.projection import advise_select_star
+from .policy.script import plan_script
+from .policy.sql_sanitize import extract_tables, source_tables, split_statement_spans, text_range
+from .policy.types import Finding
+from .payloads import get_store
+from .reuse import find_reusable, is_reusable_sql, result_key
+from .scheduler import get_scheduler
+from .tracing import OP_STATS, span, start_trace
 
-def bytes_human(num: int) -> str:
-    for unit in ["B", "KB", "MB", "GB", "TB", "PB"]:
-        if num < 1024.0:
-            return f"{num:3.1f}{unit}"
-        num /= 1024.0
-    return f"{num:.1f}EB"
+if TYPE_CHECKING:
+    from google.cloud import bigquery
 
 
 def _referenced_tables_from_job(job: bigquery.QueryJob) -> List[str]:
@@ -37,35 +52,210 @@ def _referenced_tables_from_job(job: bigquery.QueryJob) -> List[str]:
     return [f"{t.project}.{t.dataset_id}.{t.table_id}" for t in tables]
 
 
-def _resolve_project_location(config: Dict[str, Any]) -> Dict[str, Optional[str]]:
-    project = config["app"].get("default_project") or get_default_project()
-    location = config["app"].get("default_location") or get_default_location() or "asia-northeast1"
+def _resolve_project_location(config: Dict[str, Any], location: Optional[str] = None) -> Dict[str, Optional[str]]:
+    with span("resolve_project"):
+        project = config["app"].get("default_project") or get_default_project()
+        location = location or config["app"].get("default_location") or get_default_location() or "asia-northeast1"
     return {"project": project, "location": location}
 
 
-def _ensure_cache(cache: TableMetaCache, client: bigquery.Client, tables: List[str]) -> Dict[str, Dict[str, Any]]:
+def _dataset_location(
+    cache: TableMetaCache, client: bigquery.Client, sql: str, default: Optional[str], retry_s: int
+) -> Optional[str]:
+    datasets = sorted({table.rsplit(".", 1)[0] for table in source_tables(sql)})
+    missing = cache.missing_datasets(datasets, retry_s)
+    for dataset in missing:
+        with span("dataset_location", dataset=dataset):
+            cache.set_dataset(dataset, fetch_dataset_location(client, dataset))
+    if missing:
+        cache.save()
+    locations = {
+        cache.datasets[dataset]["location"].lower(): cache.datasets[dataset]["location"]
+        for dataset in datasets
+        if (cache.datasets.get(dataset) or {}).get("location")
+    }
+    # A query can only run in one location; leave mixed-region queries to fail against the default.
+    if len(locations) == 1:
+        return next(iter(locations.values()))
+    return default
+
+
+_refreshing: Dict[str, threading.Thread] = {}
+_refreshing_lock = threading.Lock()
+_refresh_save_lock = threading.Lock()
+
+
+def _refresh_dataset(
+    client: bigquery.Client, dataset: str, location: Optional[str], config: Dict[str, Any]
+) -> None:
+    try:
+        modified = fetch_modified_times(client, dataset, location, config["app"]["bq"]["labels"])
+        # Reload so entries written since this check started are kept; one dataset at a time so stamps don't race.
+        with _refresh_save_lock:
+            cache = TableMetaCache(config["app"]["cache"]["schema_version"])
+            if modified is None:
+                # No access to __TABLES__ (or no such dataset): wait out the interval instead of retrying every request.
+                cache.mark_checked(dataset)
+            else:
+                cache.apply_modified(dataset, modified)
+            cache.save()
+    finally:
+        with _refreshing_lock:
+            _refreshing.pop(dataset, None)
+
+
+def _schedule_freshness(
+    cache: TableMetaCache, client: bigquery.Client, tables: List[str], location: Optional[str], config: Dict[str, Any]
+) -> None:
+    settings = config["app"]["cache"]
+    if not settings["freshness_check"]:
+        return
+    datasets = sorted({table.rsplit(".", 1)[0] for table in tables if table.count(".") == 2})
+    # The check is a real query job; keep it off the request path and let this request use the cached entries.
+    for dataset in cache.stale_datasets(datasets, settings["freshness_interval_s"]):
+        dataset_location = (cache.datasets.get(dataset) or {}).get("location") or location
+        with _refreshing_lock:
+            if dataset in _refreshing:
+                continue
+            thread = threading.Thread(
+                target=_refresh_dataset, args=(client, dataset, dataset_location, config), daemon=True
+            )
+            _refreshing[dataset] = thread
+        thread.start()
+
+
+def _ensure_cache(
+    cache: TableMetaCache,
+    client: bigquery.Client,
+    tables: List[str],
+    location: Optional[str],
+    config: Dict[str, Any],
+) -> Dict[str, Dict[str, Any]]:
     missing = cache.missing(tables)
     for table in missing:
-        meta = fetch_table_metadata(client, table)
+        with span("metadata", table=table):
+            meta = fetch_table_metadata(client, table)
         if meta:
             cache.set(table, meta)
-    cache.save()
+    if missing:
+        cache.save()
+    _schedule_freshness(cache, client, tables, location, config)
     return {table: cache.get(table) for table in tables if cache.get(table)}
 
 
+def _execute_bytes(
+    client: bigquery.Client, sql: str, resolved: Dict[str, Optional[str]], config: Dict[str, Any]
+) -> Optional[int]:
+    budget = config["app"]["budget"]
+    spent = load_ledger().reviewed_bytes(result_key(resolved["project"], sql))
+    if spent is not None or not budget["enabled"] or not (budget["hourly_bytes"] or budget["daily_bytes"]):
+        return spent
+    # Not reviewed in this daemon (e.g. another window); a free dry run keeps the ledger honest.
+    try:
+        with span("dry_run"):
+            job = dry_run_query(
+                client, sql, resolved["location"], config["app"]["bq"]["use_query_cache"], config["app"]["bq"]["labels"]
+            )
+    except Exception:
+        return None
+    return int(job.total_bytes_processed or 0)
+
+
+def _ticket_response(status: Optional[Dict[str, Any]], location: Optional[str]) -> Dict[str, Any]:
+    if status is None:
+        return {"ok": False, "error": {"message": "Unknown queue ticket."}}
+    started = status.pop("result")
+    error = status.pop("error")
+    if status["state"] == "FAILED":
+        return {"ok": False, "error": {"message": "Execute failed.", "detail": error}}
+    if started is not None:
+        return {"ok": True, "execute": {**started, "ticket": status["ticket"], "queue": status}}
+    state = "CANCELLED" if status["state"] == "CANCELLED" else "QUEUED"
+    result = ExecuteResult(job_id=None, status=state, location=location, ticket=status["ticket"], queue=status)
+    return {"ok": True, "execute": asdict(result)}
+
+
+def _side_channel(
+    op: str,
+    payload: Dict[str, Any],
+    config: Dict[str, Any],
+    on_chunk: Optional[Callable[[Dict[str, Any]], None]],
+) -> Tuple[Callable[[Dict[str, Any]], Dict[str, Any]], Optional[Callable[[Dict[str, Any]], None]]]:
+    settings = config["app"]["side_channel"]
+    channel = payload.get("side_channel")
+    if not channel or not settings["enabled"]:
+        return (lambda container: container), on_chunk
+    owner = f"{channel}:{op}"
+    store = get_store()
+    # A newer request from the same panel supersedes whatever the previous one left unread.
+    store.supersede(owner)
+
+    def offload(container: Dict[str, Any]) -> Dict[str, Any]:
+        return store.offload(owner, container, settings["min_bytes"])
+
+    if on_chunk is None:
+        return offload, None
+    emit = on_chunk
+    return offload, lambda chunk: emit(offload(chunk))
+
+
+def _fetch_window(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if all(payload.get(key) is None for key in ("columns", "column_offset", "column_count", "start_index")):
+        return None
+    column_count = payload.get("column_count")
+    return {
+        "columns": payload.get("columns"),
+        "column_offset": int(payload.get("column_offset") or 0),
+        "column_count": None if column_count is None else int(column_count),
+        "start_index": int(payload.get("start_index") or 0),
+    }
+
+
+_warm_state: Dict[str, Any] = {"state": "cold", "error": None}
+_warm_lock = threading.Lock()
+
+
+def _warmup(config: Dict[str, Any]) -> None:
+    try:
+        import pyarrow.compute  # noqa: F401
+
+        resolved = _resolve_project_location(config)
+        client = get_client(resolved["project"], config["app"]["backend"])
+        # Dry runs are free; this one settles credentials, token refresh and the HTTP pool.
+        dry_run_query(client, "SELECT 1", resolved["location"], False, config["app"]["bq"]["labels"])
+        _warm_state.update(state="warm", error=None)
+    except Exception as exc:
+        _warm_state.update(state="failed", error=str(exc))
+
+
+def _start_warmup(config: Dict[str, Any]) -> bool:
+    with _warm_lock:
+        if _warm_state["state"] in {"warming", "warm"}:
+            return False
+        _warm_state.update(state="warming", error=None)
+    threading.Thread(target=_warmup, args=(config,), daemon=True).start()
+    return True
+
+
 def _run_estimate(sql: str, config: Dict[str, Any]) -> Dict[str, Any]:
     resolved = _resolve_project_location(config)
     project = resolved["project"]
     location = resolved["location"]
-    client = get_client(project)
+    client = get_client(project, config["app"]["backend"])
+    cache = TableMetaCache(config["app"]["cache"]["schema_version"])
+    location = _dataset_location(cache, client, sql, location, config["app"]["cache"]["dataset_retry_s"])
+    spans = split_statement_spans(sql)
+    if len(spans) > 1 and not config["app"]["policy"]["block_multi_statement"]:
+        return _run_script_estimate(sql, spans, config, client, cache, project, location)
     try:
-        job = dry_run_query(
-            client,
-            sql,
-            location,
-            config["app"]["bq"]["use_query_cache"],
-            config["app"]["bq"]["labels"],
-        )
+        with span("dry_run"):
+            job = dry_run_query(
+                client,
+                sql,
+                location,
+                config["app"]["bq"]["use_query_cache"],
+                config["app"]["bq"]["labels"],
+            )
     except Exception as exc:
         append_history(
             {
@@ -83,18 +273,21 @@ def _run_estimate(sql: str, config: Dict[str, Any]) -> Dict[str, Any]:
     if not referenced:
         referenced = extract_tables(sql)
 
-    cache = TableMetaCache(config["app"]["cache"]["schema_version"])
-    table_meta = _ensure_cache(cache, client, referenced)
-
-    findings = run_policy_checks(sql, bytes_processed, config["app"]["policy"], config["app"]["limits"])
-    partition_findings, partition_summary = enforce_partition_filters(
-        sql,
-        referenced,
-        table_meta,
-        config["app"]["exceptions"]["partition_exempt_tables"],
-        config["app"]["policy"]["enforce_partition_filter"],
-    )
+    table_meta = _ensure_cache(cache, client, referenced, location, config)
+
+    with span("policy"):
+        findings = run_policy_checks(sql, bytes_processed, config["app"]["policy"], config["app"]["limits"])
+    with span("partition"):
+        partition_findings, partition_summary = enforce_partition_filters(
+            sql,
+            referenced,
+            table_meta,
+            config["app"]["exceptions"]["partition_exempt_tables"],
+            config["app"]["policy"]["enforce_partition_filter"],
+        )
     findings.extend(partition_findings)
+    if config["app"]["policy"]["warn_select_star"]:
+        findings.extend(advise_select_star(sql, referenced, table_meta))
 
     result = EstimateResult(
         bytes_processed=bytes_processed,
@@ -124,9 +317,159 @@ def _run_estimate(sql: str, config: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def handle_request(payload: Dict[str, Any]) -> Dict[str, Any]:
-    config = ConfigLoader().load()
+def _run_script_estimate(
+    sql: str,
+    spans: List[Tuple[int, int]],
+    config: Dict[str, Any],
+    client: bigquery.Client,
+    cache: TableMetaCache,
+    project: Optional[str],
+    location: Optional[str],
+) -> Dict[str, Any]:
+    plan = plan_script(sql, spans)
+    with span("dry_run", units=len(plan.units)):
+        outcomes = dry_run_many(
+            client,
+            [unit.sql for unit in plan.units],
+            location,
+            config["app"]["bq"]["use_query_cache"],
+            config["app"]["bq"]["labels"],
+            config["app"]["bq"]["script_concurrency"],
+        )
+    if all(job is None for job, _ in outcomes):
+        error = next(exc for _, exc in outcomes if exc is not None)
+        append_history(
+            {
+                "status": "DRYRUN_FAILED",
+                "project": project,
+                "location": location,
+                "sql": sql,
+                "error": str(error),
+            }
+        )
+        raise error
+
+    referenced: Dict[str, None] = {}
+    units = []
+    unit_of: Dict[int, int] = {}
+    failures: List[Finding] = []
+    for number, (unit, (job, error)) in enumerate(zip(plan.units, outcomes)):
+        unit_bytes = None if job is None else int(job.total_bytes_processed or 0)
+        if job is not None:
+            referenced.update(dict.fromkeys(_referenced_tables_from_job(job) or extract_tables(unit.sql)))
+        else:
+            start, end = spans[unit.statements[0]]
+            failures.append(
+                Finding(
+                    severity="ERROR",
+                    code="STATEMENT_DRYRUN_FAILED",
+                    message=f"Dry run failed for statement {unit.statements[0] + 1}.",
+                    evidence=str(error),
+                    **text_range(sql, start, end),
+                )
+            )
+        units.append(
+            {
+                "statements": unit.statements,
+                "bytes_processed": unit_bytes,
+                "bytes_human": None if unit_bytes is None else bytes_human(unit_bytes),
+                "error": None if error is None else str(error),
+            }
+        )
+        unit_of.update(dict.fromkeys(unit.statements, number))
+    bytes_processed = sum(unit["bytes_processed"] or 0 for unit in units)
+
+    table_meta = _ensure_cache(cache, client, list(referenced), location, config)
+
+    with span("policy"):
+        linted = LINTER.lint_statements(
+            sql,
+            spans,
+            config["app"]["policy"],
+            table_meta,
+            config["app"]["exceptions"]["partition_exempt_tables"],
+            config["app"]["policy"]["enforce_partition_filter"],
+        )
+    limits = config["app"]["limits"]
+    findings = check_bytes(bytes_processed, limits["warn_bytes"], limits["block_bytes"])
+    findings.extend(check_multi_statement(sql, False, spans))
+    findings.extend(failures)
+    summary: Dict[str, Dict[str, object]] = {}
+    statements = []
+    for index, item in enumerate(linted):
+        unit = units[unit_of[index]]
+        findings.extend(item["findings"])
+        merge_partition_summary(summary, item["partition_summary"])
+        statements.append(
+            {
+                "index": index,
+                "kind": plan.kinds[index],
+                "unit": unit_of[index],
+                "line": item["line"],
+                "column": item["column"],
+                "end_line": item["end_line"],
+                "end_column": item["end_column"],
+                "bytes_processed": unit["bytes_processed"] if len(unit["statements"]) == 1 else None,
+                "referenced_tables": item["tables"],
+                "findings": [asdict(f) for f in item["findings"]],
+            }
+        )
+
+    result = EstimateResult(
+        bytes_processed=bytes_processed,
+        bytes_human=bytes_human(bytes_processed),
+        referenced_tables=list(referenced),
+        findings=findings,
+        partition_summary=list(summary.values()),
+        statements=statements,
+        units=units,
+    )
+    append_history(
+        {
+            "status": "ESTIMATED",
+            "project": project,
+            "location": location,
+            "sql": sql,
+            "dry_run_bytes": bytes_processed,
+            "referenced_tables": result.referenced_tables,
+            "findings": [asdict(f) for f in findings],
+        }
+    )
+    return {
+        "project": project,
+        "location": location,
+        "result": result,
+    }
+
+
+def handle_request(
+    payload: Dict[str, Any], on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
     op = payload.get("op")
+    with start_trace(op) as tracer:
+        with span("config"):
+            config = ConfigLoader().load()
+        response = _dispatch(op, payload, config, on_chunk)
+    tracing = config["app"]["tracing"]
+    OP_STATS.window = tracing["window"]
+    if isinstance(op, str) and op != "metrics":
+        OP_STATS.record(op, tracer.total_ms)
+    if tracing["timings"]:
+        response["timings"] = tracer.timings()
+    if tracing["export"]:
+        try:
+            tracer.export(get_trace_path())
+        except OSError:
+            pass
+    return response
+
+
+def _dispatch(
+    op: Optional[str],
+    payload: Dict[str, Any],
+    config: Dict[str, Any],
+    on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
     sql = payload.get("sql")
 
     if op in {"estimate", "review"}:
@@ -137,8 +480,29 @@ def handle_request(payload: Dict[str, Any]) -> Dict[str, Any]:
         except Exception as exc:
             return {"ok": False, "error": {"message": "Dry run failed.", "detail": str(exc)}}
         result: EstimateResult = estimate_data["result"]
+        reuse = None
+        budget = None
         if op == "review":
+            # The scheduler sizes execute from this even when budgets are off.
+            load_ledger().note_review(result_key(estimate_data["project"], sql), result.bytes_processed)
+            if config["app"]["budget"]["enabled"]:
+                with span("budget"):
+                    budget_findings, budget = check_budget(
+                        (get_default_account(), estimate_data["project"]),
+                        result.bytes_processed,
+                        config["app"]["budget"],
+                    )
+                result.findings.extend(budget_findings)
             has_error = any(finding.severity == "ERROR" for finding in result.findings)
+            if not has_error and config["app"]["reuse"]["enabled"]:
+                client = get_client(estimate_data["project"], config["app"]["backend"])
+                with span("reuse"):
+                    reuse = find_reusable(
+                        lambda job_id, location: reusable_job(client, job_id, location),
+                        estimate_data["project"],
+                        sql,
+                        config["app"]["reuse"]["window_s"],
+                    )
             if has_error:
                 append_history(
                     {
@@ -161,6 +525,32 @@ def handle_request(payload: Dict[str, Any]) -> Dict[str, Any]:
                 "referenced_tables": result.referenced_tables,
                 "findings": [asdict(f) for f in result.findings],
                 "partition_summary": result.partition_summary,
+                "statements": result.statements,
+                "units": result.units,
+            },
+            "reuse": reuse,
+            "budget": budget,
+        }
+
+    if op == "lint":
+        if sql is None:
+            return {"ok": False, "error": {"message": "SQL is required."}}
+        cache = load_shared_cache(config["app"]["cache"]["schema_version"])
+        with span("lint"):
+            findings, tables, summary, statements = LINTER.lint(
+                sql,
+                config["app"]["policy"],
+                cache.tables,
+                config["app"]["exceptions"]["partition_exempt_tables"],
+                config["app"]["policy"]["enforce_partition_filter"],
+            )
+        return {
+            "ok": True,
+            "lint": {
+                "findings": [asdict(f) for f in findings],
+                "referenced_tables": tables,
+                "partition_summary": summary,
+                "statements": statements,
             },
         }
 
@@ -168,51 +558,114 @@ def handle_request(payload: Dict[str, Any]) -> Dict[str, Any]:
         if not sql:
             return {"ok": False, "error": {"message": "SQL is required."}}
         resolved = _resolve_project_location(config)
-        client = get_client(resolved["project"])
-        try:
-            job = execute_query(
-                client,
-                sql,
-                resolved["location"],
-                config["app"]["bq"]["use_query_cache"],
-                config["app"]["bq"]["labels"],
-            )
-            job_id = job.job_id
-            result = ExecuteResult(job_id=job_id, status="EXECUTED")
+        client = get_client(resolved["project"], config["app"]["backend"])
+        reuse_job_id = payload.get("reuse_job_id")
+        if reuse_job_id and config["app"]["reuse"]["enabled"] and is_reusable_sql(sql):
+            with span("reuse"):
+                reused = reusable_job(client, reuse_job_id, payload.get("location") or resolved["location"])
+            if reused:
+                append_history(
+                    {
+                        "status": "REUSED",
+                        "project": resolved["project"],
+                        "location": reused["location"],
+                        "sql": sql,
+                        "job_id": reused["job_id"],
+                    }
+                )
+                result = ExecuteResult(job_id=reused["job_id"], status="REUSED", location=reused["location"])
+                return {"ok": True, "execute": asdict(result)}
+        cache = TableMetaCache(config["app"]["cache"]["schema_version"])
+        resolved["location"] = _dataset_location(
+            cache, client, sql, resolved["location"], config["app"]["cache"]["dataset_retry_s"]
+        )
+        spent = _execute_bytes(client, sql, resolved, config)
+
+        def start() -> Dict[str, Any]:
+            try:
+                with span("execute"):
+                    job = execute_query(
+                        client,
+                        sql,
+                        resolved["location"],
+                        config["app"]["bq"]["use_query_cache"],
+                        config["app"]["bq"]["labels"],
+                    )
+            except Exception as exc:
+                append_history(
+                    {
+                        "status": "EXEC_FAILED",
+                        "project": resolved["project"],
+                        "location": resolved["location"],
+                        "sql": sql,
+                        "error": str(exc),
+                    }
+                )
+                raise
             append_history(
                 {
                     "status": "EXECUTED",
                     "project": resolved["project"],
                     "location": resolved["location"],
+                    "user": get_default_account(),
                     "sql": sql,
-                    "job_id": job_id,
+                    "job_id": job.job_id,
+                    "dry_run_bytes": spent,
                 }
             )
-            return {"ok": True, "execute": asdict(result)}
-        except Exception as exc:
-            append_history(
-                {
-                    "status": "EXEC_FAILED",
-                    "project": resolved["project"],
-                    "location": resolved["location"],
-                    "sql": sql,
-                    "error": str(exc),
-                }
+            return asdict(ExecuteResult(job_id=job.job_id, status="EXECUTED", location=resolved["location"]))
+
+        if not config["app"]["scheduler"]["enabled"]:
+            try:
+                return {"ok": True, "execute": start()}
+            except Exception as exc:
+                return {"ok": False, "error": {"message": "Execute failed.", "detail": str(exc)}}
+        scheduler = get_scheduler(config["app"]["scheduler"])
+        with span("schedule"):
+            ticket = scheduler.submit(
+                resolved["project"],
+                spent,
+                int(payload.get("priority") or 0),
+                start,
+                lambda started: job_finished(client, started["job_id"], started["location"]),
             )
-            return {"ok": False, "error": {"message": "Execute failed.", "detail": str(exc)}}
+        return _ticket_response(scheduler.status(ticket.ticket_id), resolved["location"])
+
+    if op == "queue_status":
+        ticket_id = payload.get("ticket")
+        if not ticket_id:
+            return {"ok": False, "error": {"message": "ticket is required."}}
+        return _ticket_response(get_scheduler(config["app"]["scheduler"]).status(ticket_id), payload.get("location"))
+
+    if op == "cancel_queued":
+        ticket_id = payload.get("ticket")
+        if not ticket_id:
+            return {"ok": False, "error": {"message": "ticket is required."}}
+        return {"ok": True, "cancelled": get_scheduler(config["app"]["scheduler"]).cancel(ticket_id)}
 
     if op == "fetch_preview":
         job_id = payload.get("job_id")
         if not job_id:
             return {"ok": False, "error": {"message": "job_id is required."}}
-        resolved = _resolve_project_location(config)
-        client = get_client(resolved["project"])
+        resolved = _resolve_project_location(config, payload.get("location"))
+        client = get_client(resolved["project"], config["app"]["backend"])
+        offload, on_chunk = _side_channel(op, payload, config, on_chunk)
         try:
-            data = fetch_preview_rows(
-                client, job_id, resolved["location"], config["app"]["preview_rows"]
-            )
+            window = _fetch_window(payload)
+            with span("fetch"):
+                if window is None:
+                    data = fetch_preview_rows(client, job_id, resolved["location"], config["app"]["preview_rows"])
+                else:
+                    data = fetch_window_rows(
+                        client,
+                        job_id,
+                        resolved["location"],
+                        max_rows=config["app"]["preview_rows"],
+                        on_rows=on_chunk if payload.get("stream") else None,
+                        **window,
+                    )
             result = FetchResult(**data)
-            return {"ok": True, "preview": asdict(result)}
+            return {"ok": True, "preview": offload(vars(result))}
         except Exception as exc:
             return {"ok": False, "error": {"message": "Preview failed.", "detail": str(exc)}}
 
@@ -220,18 +673,33 @@ def handle_request(payload: Dict[str, Any]) -> Dict[str, Any]:
         job_id = payload.get("job_id")
         if not job_id:
             return {"ok": False, "error": {"message": "job_id is required."}}
-        resolved = _resolve_project_location(config)
-        client = get_client(resolved["project"])
+        resolved = _resolve_project_location(config, payload.get("location"))
+        client = get_client(resolved["project"], config["app"]["backend"])
+        offload, on_chunk = _side_channel(op, payload, config, on_chunk)
         try:
-            data = fetch_page_rows(
-                client,
-                job_id,
-                resolved["location"],
-                config["app"]["page_size"],
-                payload.get("page_token"),
-            )
+            window = _fetch_window(payload)
+            with span("fetch"):
+                if window is None:
+                    data = fetch_page_rows(
+                        client,
+                        job_id,
+                        resolved["location"],
+                        config["app"]["page_size"],
+                        payload.get("page_token"),
+                    )
+                else:
+                    paging = config["app"]["paging"]
+                    data = fetch_window_rows(
+                        client,
+                        job_id,
+                        resolved["location"],
+                        max_rows=None if paging["adaptive"] else config["app"]["page_size"],
+                        paging=paging,
+                        on_rows=on_chunk if payload.get("stream") else None,
+                        **window,
+                    )
             result = FetchResult(**data)
-            return {"ok": True, "page": asdict(result)}
+            return {"ok": True, "page": offload(vars(result))}
         except Exception as exc:
             return {"ok": False, "error": {"message": "Page fetch failed.", "detail": str(exc)}}
 
@@ -241,17 +709,18 @@ def handle_request(payload: Dict[str, Any]) -> Dict[str, Any]:
         out_path = payload.get("out_path")
         if not job_id or not mode or not out_path:
             return {"ok": False, "error": {"message": "job_id, mode, out_path required."}}
-        resolved = _resolve_project_location(config)
-        client = get_client(resolved["project"])
+        resolved = _resolve_project_location(config, payload.get("location"))
+        client = get_client(resolved["project"], config["app"]["backend"])
         try:
-            total_rows = export_rows(
-                client,
-                job_id,
-                resolved["location"],
-                mode,
-                out_path,
-                config["app"]["page_size"],
-            )
+            with span("export"):
+                total_rows = export_rows(
+                    client,
+                    job_id,
+                    resolved["location"],
+                    mode,
+                    out_path,
+                    config["app"]["page_size"],
+                )
             append_history(
                 {
                     "status": "EXPORTED",
@@ -277,17 +746,39 @@ def handle_request(payload: Dict[str, Any]) -> Dict[str, Any]:
     if op == "refresh_metadata":
         tables = payload.get("tables") or []
         resolved = _resolve_project_location(config)
-        client = get_client(resolved["project"])
+        client = get_client(resolved["project"], config["app"]["backend"])
         cache = TableMetaCache(config["app"]["cache"]["schema_version"])
         refreshed = []
         for table in tables:
-            meta = fetch_table_metadata(client, table)
+            with span("metadata", table=table):
+                meta = fetch_table_metadata(client, table)
             if meta:
                 cache.set(table, meta)
                 refreshed.append(table)
         cache.save()
         return {"ok": True, "refreshed": refreshed}
 
+    if op == "ping":
+        return {"ok": True, "pid": os.getpid(), "warm": dict(_warm_state)}
+
+    if op == "warmup":
+        started = _start_warmup(config)
+        return {"ok": True, "started": started, "warm": dict(_warm_state)}
+
+    if op == "release_payload":
+        handle = payload.get("handle")
+        if not handle:
+            return {"ok": False, "error": {"message": "handle is required."}}
+        return {"ok": True, "released": get_store().release(handle)}
+
+    if op == "metrics":
+        return {
+            "ok": True,
+            "metrics": OP_STATS.snapshot(),
+            "api": api_stats(),
+            "queue": get_scheduler(config["app"]["scheduler"]).snapshot(),
+        }
+
     if op == "get_effective_config":
         return {
             "ok": True,
@@ -296,25 +787,78 @@ def handle_request(payload: Dict[str, Any]) -> Dict[str, Any]:
                 "config": ConfigLoader().config_path,
                 "history": get_history_path(),
                 "cache": get_cache_path(),
+                "trace": get_trace_path(),
             },
         }
 
     return {"ok": False, "error": {"message": f"Unknown op {op}."}}
 
 
-def main() -> None:
-    for line in sys.stdin:
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def respond(payload: Any, on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None) -> str:
+    request_id = payload.get("id") if isinstance(payload, dict) else None
+    try:
+        response = handle_request(payload, on_chunk)
+        if request_id is not None:
+            response["id"] = request_id
+        return json.dumps(response, ensure_ascii=False) + "\n"
+    except Exception as exc:
+        response = {"ok": False, "error": {"message": "Unhandled error", "detail": str(exc)}}
+        if request_id is not None:
+            response["id"] = request_id
+        return json.dumps(response, ensure_ascii=False) + "\n"
+
+
+def _chunk_writer(request_id: Any, emit: Callable[[str], None]) -> Callable[[Dict[str, Any]], None]:
+    return lambda chunk: emit(json.dumps({"id": request_id, "chunk": chunk}, ensure_ascii=False) + "\n")
+
+
+# Requests carrying an "id" run on the pool and may be answered out of order;
+# the rest are answered inline, in order, as before.
+def serve_stream(lines: Iterable[str], write: Callable[[str], None]) -> None:
+    global _executor
+    lock = threading.Lock()
+
+    def emit(text: str) -> None:
+        with lock:
+            write(text)
+
+    for line in lines:
         line = line.strip()
         if not line:
             continue
         try:
             payload = json.loads(line)
-            response = handle_request(payload)
         except Exception as exc:
-            response = {"ok": False, "error": {"message": "Unhandled error", "detail": str(exc)}}
-        sys.stdout.write(json.dumps(response, ensure_ascii=False) + "\n")
+            emit(json.dumps({"ok": False, "error": {"message": "Unhandled error", "detail": str(exc)}}) + "\n")
+            continue
+        if isinstance(payload, dict) and payload.get("id") is not None:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="bq_guard")
+            _executor.submit(lambda item=payload: emit(respond(item, _chunk_writer(item["id"], emit))))
+        else:
+            emit(respond(payload))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="bq-guard")
+    parser.add_argument("--serve", action="store_true", help="Run as a shared daemon on a Unix socket.")
+    parser.add_argument("--socket", default=None, help="Socket path for --serve.")
+    parser.add_argument("--idle-timeout", type=float, default=1800, help="Exit --serve after this many idle seconds.")
+    args = parser.parse_args(argv)
+    if args.serve:
+        from .daemon import serve
+
+        sys.exit(serve(args.socket or get_socket_path(), serve_stream, args.idle_timeout))
+
+    def write(text: str) -> None:
+        sys.stdout.write(text)
         sys.stdout.flush()
 
+    serve_stream(sys.stdin, write)
+
 
 if __name__ == "__main__":
     main()
@@ -2,17 +2,24 @@ from __future__ import annotations
 
 import copy
 import json
+import os
+import stat
+import tempfile
 from typing import Any, Dict
 
-import yaml
-from platformdirs import user_cache_dir, user_config_dir
-
 DEFAULT_CONFIG: Dict[str, Any] = {
     "app": {
         "default_project": None,
         "default_location": None,
         "preview_rows": 50,
         "page_size": 1000,
+        "paging": {
+            "adaptive": True,
+            "target_bytes": 4194304,
+            "chunk_bytes": 262144,
+            "min_rows": 100,
+            "max_rows": 20000,
+        },
         "limits": {
             "warn_bytes": 107374182400,
             "block_bytes": 536870912000,
@@ -31,23 +38,84 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         },
         "cache": {
             "schema_version": 1,
+            "freshness_check": True,
+            "freshness_interval_s": 300,
+            "dataset_retry_s": 3600,
         },
         "bq": {
             "use_query_cache": False,
+            "script_concurrency": 4,
             "labels": {
                 "app": "bq-guard",
                 "env": "gce",
             },
         },
+        "budget": {
+            "enabled": True,
+            "hourly_bytes": None,
+            "daily_bytes": None,
+            "warn_ratio": 0.8,
+        },
+        "reuse": {
+            "enabled": True,
+            "window_s": 3600,
+        },
+        "side_channel": {
+            "enabled": True,
+            "min_bytes": 262144,
+        },
+        "scheduler": {
+            "enabled": True,
+            "max_running_per_project": 2,
+            "small_bytes": 1073741824,
+            "poll_s": 2,
+            "slot_dir": None,
+        },
         "ui": {
             "auto_estimate_debounce_ms": 900,
         },
+        "backend": {
+            "type": "bigquery",
+            "fake": {
+                "seed": 0,
+                "default_table_bytes": 1073741824,
+                "strict_tables": False,
+                "tables": {},
+                "datasets": {},
+                "result_rows": 1000,
+                "result_columns": 10,
+                "latency_ms": {},
+                "error_rate": {},
+                "error_code": 503,
+            },
+            "rate_limits": {
+                "query": {"rate": 10, "burst": 20},
+                "get_job": {"rate": 20, "burst": 40},
+                "get_table": {"rate": 20, "burst": 40},
+                "get_dataset": {"rate": 20, "burst": 40},
+            },
+            "retry": {
+                "attempts": 4,
+                "base_ms": 250,
+                "cap_ms": 8000,
+            },
+        },
+        "tracing": {
+            "timings": True,
+            "export": False,
+            "window": 500,
+        },
     }
 }
 
 
+_loaded: Dict[str, Any] = {}
+
+
 class ConfigLoader:
     def __init__(self) -> None:
+        from platformdirs import user_config_dir
+
         self.config_dir = user_config_dir("bq_guard")
         self.config_path = f"{self.config_dir}/config.yaml"
         self._config = None
@@ -55,20 +123,35 @@ class ConfigLoader:
     def load(self) -> Dict[str, Any]:
         if self._config is not None:
             return self._config
+        try:
+            with open(self.config_path, "rb") as handle:
+                raw = handle.read()
+        except OSError:
+            raw = None
+        cached = _loaded.get(self.config_path)
+        if raw is not None and cached and cached[0] == raw:
+            self._config = copy.deepcopy(cached[1])
+            return self._config
+
+        import yaml
+
         data = copy.deepcopy(DEFAULT_CONFIG)
         try:
-            with open(self.config_path, "r", encoding="utf-8") as handle:
-                loaded = yaml.safe_load(handle) or {}
+            if raw is None:
+                raise FileNotFoundError(self.config_path)
+            loaded = yaml.safe_load(raw.decode("utf-8")) or {}
             data = self._merge(data, loaded)
         except FileNotFoundError:
             self._ensure_default_written(data)
         except Exception:
             self._ensure_default_written(data)
         self._config = self._validate(data)
+        if raw is not None:
+            _loaded[self.config_path] = (raw, copy.deepcopy(self._config))
         return self._config
 
     def _ensure_default_written(self, data: Dict[str, Any]) -> None:
-        import os
+        import yaml
 
         os.makedirs(self.config_dir, exist_ok=True)
         with open(self.config_path, "w", encoding="utf-8") as handle:
@@ -100,9 +183,16 @@ class ConfigLoader:
         data["app"]["limits"]["warn_bytes"] = safe_int("app.limits.warn_bytes", 107374182400)
         data["app"]["limits"]["block_bytes"] = safe_int("app.limits.block_bytes", 536870912000)
         data["app"]["cache"]["schema_version"] = safe_int("app.cache.schema_version", 1)
+        data["app"]["cache"]["freshness_interval_s"] = safe_int("app.cache.freshness_interval_s", 300)
+        data["app"]["cache"]["dataset_retry_s"] = safe_int("app.cache.dataset_retry_s", 3600)
+        data["app"]["side_channel"]["min_bytes"] = safe_int("app.side_channel.min_bytes", 262144)
+        data["app"]["scheduler"]["max_running_per_project"] = (
+            safe_int("app.scheduler.max_running_per_project", 2) or 1
+        )
         data["app"]["ui"]["auto_estimate_debounce_ms"] = safe_int(
             "app.ui.auto_estimate_debounce_ms", 900
         )
+        data["app"]["tracing"]["window"] = safe_int("app.tracing.window", 500) or 500
         return data
 
     def as_json(self) -> str:
@@ -110,12 +200,43 @@ class ConfigLoader:
 
 
 def get_cache_path() -> str:
+    from platformdirs import user_cache_dir
+
     cache_dir = user_cache_dir("bq_guard")
     return f"{cache_dir}/table_meta_cache.json"
 
 
+def get_socket_path() -> str:
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"bq_guard-{os.getuid()}", "daemon.sock")
+
+
+def ensure_private_dir(path: str) -> str:
+    # Without XDG_RUNTIME_DIR these live under a shared /tmp, where another user could have made them first.
+    try:
+        os.mkdir(path, 0o700)
+        os.chmod(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) != 0o700:
+        raise PermissionError(f"{path} must be a directory owned by uid {os.getuid()} with mode 0700.")
+    return path
+
+
+def get_payload_dir() -> str:
+    return os.path.join(os.path.dirname(get_socket_path()), "payloads")
+
+
 def get_history_path() -> str:
     from platformdirs import user_state_dir
 
     history_dir = user_state_dir("bq_guard")
     return f"{history_dir}/history.jsonl"
+
+
+def get_trace_path() -> str:
+    from platformdirs import user_state_dir
+
+    trace_dir = user_state_dir("bq_guard")
+    return f"{trace_dir}/trace.jsonl"
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+StreamHandler = Callable[[Iterable[str], Callable[[str], None]], None]
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, serve_stream: StreamHandler) -> None:
+        self.serve_stream = serve_stream
+        self.active = 0
+        self.last_activity = time.monotonic()
+        self.lock = threading.Lock()
+        super().__init__(path, _Handler)
+
+    def touch(self, delta: int = 0) -> None:
+        with self.lock:
+            self.active += delta
+            self.last_activity = time.monotonic()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: _Server
+
+    def _lines(self) -> Iterator[str]:
+        for raw in self.rfile:
+            self.server.touch()
+            yield raw.decode("utf-8")
+
+    def _write(self, text: str) -> None:
+        self.wfile.write(text.encode("utf-8"))
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        self.server.touch(1)
+        try:
+            self.server.serve_stream(self._lines(), self._write)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.server.touch(-1)
+
+
+def _socket_in_use(path: str) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def _watch_idle(server: _Server, idle_timeout: float) -> None:
+    while True:
+        time.sleep(min(idle_timeout, 5.0))
+        with server.lock:
+            idle = server.active == 0 and time.monotonic() - server.last_activity >= idle_timeout
+        if idle:
+            server.shutdown()
+            return
+
+
+def serve(path: str, serve_stream: StreamHandler, idle_timeout: float = 0) -> int:
+    from .config import ensure_private_dir
+
+    try:
+        ensure_private_dir(os.path.dirname(path))
+    except OSError as exc:
+        sys.stderr.write(f"bq_guard daemon refusing {os.path.dirname(path)}: {exc}\n")
+        return 1
+    if os.path.exists(path):
+        if _socket_in_use(path):
+            sys.stderr.write(f"bq_guard daemon already listening on {path}\n")
+            return 0
+        os.unlink(path)
+    try:
+        server = _Server(path, serve_stream)
+    except OSError as exc:
+        sys.stderr.write(f"bq_guard daemon could not bind {path}: {exc}\n")
+        return 1
+    os.chmod(path, 0o600)
+    if idle_timeout > 0:
+        threading.Thread(target=_watch_idle, args=(server, idle_timeout), daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    return 0
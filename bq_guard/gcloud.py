@@ -1,10 +1,55 @@
 from __future__ import annotations
 
+import os
 import subprocess
-from typing import Optional
+import threading
+from typing import Dict, Optional, Tuple
+
+_values: Dict[str, Tuple[Tuple[object, ...], Optional[str]]] = {}
+_values_lock = threading.Lock()
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _config_stamp() -> Tuple[object, ...]:
+    # `gcloud config set` rewrites the active configuration file and `configurations activate` rewrites
+    # active_config, so their mtimes tell a long-lived daemon when to ask gcloud again.
+    config_dir = os.environ.get("CLOUDSDK_CONFIG") or os.path.expanduser("~/.config/gcloud")
+    active_path = os.path.join(config_dir, "active_config")
+    active = os.environ.get("CLOUDSDK_ACTIVE_CONFIG_NAME")
+    if not active:
+        try:
+            with open(active_path, "r", encoding="utf-8") as handle:
+                active = handle.read().strip()
+        except OSError:
+            active = "default"
+    overrides = tuple(sorted((key, value) for key, value in os.environ.items() if key.startswith("CLOUDSDK_")))
+    return (
+        overrides,
+        _mtime(active_path),
+        active,
+        _mtime(os.path.join(config_dir, "configurations", f"config_{active}")),
+    )
 
 
 def _get_value(key: str) -> Optional[str]:
+    stamp = _config_stamp()
+    with _values_lock:
+        cached = _values.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    value = _read_value(key)
+    with _values_lock:
+        _values[key] = (stamp, value)
+    return value
+
+
+def _read_value(key: str) -> Optional[str]:
     try:
         result = subprocess.run(
             ["gcloud", "config", "get-value", key],
@@ -26,6 +71,10 @@ def get_default_project() -> Optional[str]:
     return _get_value("project")
 
 
+def get_default_account() -> Optional[str]:
+    return _get_value("account")
+
+
 def get_default_location() -> Optional[str]:
     for key in ["dataproc/region", "run/region", "compute/region"]:
         value = _get_value(key)
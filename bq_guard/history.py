@@ -1,18 +1,67 @@
 from __future__ import annotations
 
 import json
+import os
+import threading
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional
 
 from .config import get_history_path
+from .tracing import span
 
 
 def append_history(entry: Dict[str, Any]) -> None:
+    with span("history"):
+        _append(entry)
+
+
+def _append(entry: Dict[str, Any]) -> None:
     path = get_history_path()
     entry = dict(entry)
     entry.setdefault("ts", datetime.now(timezone.utc).isoformat())
-    import os
-
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "a", encoding="utf-8") as handle:
         handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+class HistoryFollower:
+    def __init__(self, path: str, on_entry: Callable[[Dict[str, Any]], None], on_reset: Callable[[], None]) -> None:
+        self.path = path
+        self._on_entry = on_entry
+        self._on_reset = on_reset
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        with self._lock:
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                self._on_reset()
+                self._offset = 0
+                self._inode = stat.st_ino
+            if stat.st_size == self._offset:
+                return
+            with open(self.path, "rb") as handle:
+                handle.seek(self._offset)
+                chunk = handle.read()
+            # Only consume complete lines; a concurrent append may be mid-write.
+            complete = chunk[: chunk.rfind(b"\n") + 1]
+            self._offset += len(complete)
+            for raw in complete.splitlines():
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict):
+                    self._on_entry(entry)
+
+
+def entry_time(entry: Dict[str, Any]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(entry["ts"])
+    except (KeyError, TypeError, ValueError):
+        return None
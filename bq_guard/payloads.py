@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import ensure_private_dir, get_payload_dir
+
+Segment = Tuple[str, str]
+_SAMPLE_ROWS = 64
+
+
+def estimate_json_bytes(rows: List[Any]) -> int:
+    # Encode a sample and scale it up; the inline case is encoded again by respond() anyway.
+    sample = rows[:_SAMPLE_ROWS]
+    if not sample:
+        return 0
+    return len(json.dumps(sample, ensure_ascii=False).encode("utf-8")) * len(rows) // len(sample)
+
+
+def encode_ndjson(rows: List[Any]) -> bytes:
+    return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+
+
+class PayloadStore:
+    def __init__(self, directory: str, max_segments: int = 64, grace_s: float = 60.0) -> None:
+        self.directory = directory
+        self.max_segments = max(1, int(max_segments))
+        self.grace_s = float(grace_s)
+        self._segments: "OrderedDict[str, Segment]" = OrderedDict()
+        # Superseded or evicted segments whose handle may still be in flight to the extension.
+        self._retired: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _retire(self, handle: str, path: str) -> None:
+        self._retired[handle] = (path, time.monotonic() + self.grace_s)
+
+    def _sweep(self) -> List[str]:
+        now = time.monotonic()
+        expired = [handle for handle, (_, deadline) in self._retired.items() if deadline <= now]
+        return [self._retired.pop(handle)[0] for handle in expired]
+
+    def put(self, owner: str, data: bytes) -> Dict[str, Any]:
+        ensure_private_dir(os.path.dirname(self.directory))
+        ensure_private_dir(self.directory)
+        handle = uuid.uuid4().hex
+        path = os.path.join(self.directory, f"{handle}.json")
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as stream:
+            stream.write(data)
+        with self._lock:
+            self._segments[handle] = (owner, path)
+            while len(self._segments) > self.max_segments:
+                evicted, (_, evicted_path) = self._segments.popitem(last=False)
+                self._retire(evicted, evicted_path)
+            expired = self._sweep()
+        for stale in expired:
+            _unlink(stale)
+        return {"handle": handle, "path": path, "offset": 0, "length": len(data), "format": "ndjson"}
+
+    def supersede(self, owner: str) -> int:
+        # The extension may still be reading these; unlink them once released or after grace_s.
+        with self._lock:
+            handles = [handle for handle, (known, _) in self._segments.items() if known == owner]
+            for handle in handles:
+                self._retire(handle, self._segments.pop(handle)[1])
+            expired = self._sweep()
+        for path in expired:
+            _unlink(path)
+        return len(handles)
+
+    def release(self, handle: str) -> bool:
+        with self._lock:
+            segment = self._segments.pop(handle, None)
+            retired = self._retired.pop(handle, None)
+        path = segment[1] if segment is not None else retired[0] if retired is not None else None
+        if path is None:
+            return False
+        _unlink(path)
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            paths = [path for _, path in self._segments.values()]
+            paths.extend(path for path, _ in self._retired.values())
+            self._segments.clear()
+            self._retired.clear()
+        for path in paths:
+            _unlink(path)
+
+    def offload(self, owner: Optional[str], container: Dict[str, Any], min_bytes: int) -> Dict[str, Any]:
+        rows: List[Any] = container.get("rows") or []
+        if not owner or not rows or estimate_json_bytes(rows) < min_bytes:
+            return container
+        try:
+            handle = self.put(owner, encode_ndjson(rows))
+        except OSError:
+            return container
+        return {**container, "rows": [], "rows_handle": handle}
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+_stores: Dict[str, PayloadStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store() -> PayloadStore:
+    directory = get_payload_dir()
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = PayloadStore(directory)
+            atexit.register(store.clear)
+            _stores[directory] = store
+        return store
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
 import re
-from typing import List
+from typing import List, Optional, Tuple
 
 from .types import Finding
-from .sql_sanitize import normalize_sql, split_statements
+from .sql_sanitize import normalize_sql, split_statement_spans, text_range
+
+
+def bytes_human(num: float) -> str:
+    for unit in ["B", "KB", "MB", "GB", "TB", "PB"]:
+        if num < 1024.0:
+            return f"{num:3.1f}{unit}"
+        num /= 1024.0
+    return f"{num:.1f}EB"
 
 
 def check_bytes(bytes_processed: int, warn_bytes: int, block_bytes: int) -> List[Finding]:
@@ -33,16 +41,32 @@ def check_bytes(bytes_processed: int, warn_bytes: int, block_bytes: int) -> List
 def check_select_star(sql: str, enabled: bool) -> List[Finding]:
     if not enabled:
         return []
-    if re.search(r"select\s+\*", sql, re.IGNORECASE):
-        return [Finding(severity="WARN", code="SELECT_STAR", message="SELECT * detected.")]
+    match = re.search(r"select\s+\*", sql, re.IGNORECASE)
+    if match:
+        return [
+            Finding(
+                severity="WARN",
+                code="SELECT_STAR",
+                message="SELECT * detected.",
+                **text_range(sql, match.start(), match.end()),
+            )
+        ]
     return []
 
 
 def check_cross_join(sql: str, enabled: bool) -> List[Finding]:
     if not enabled:
         return []
-    if re.search(r"cross\s+join", sql, re.IGNORECASE):
-        return [Finding(severity="WARN", code="CROSS_JOIN", message="CROSS JOIN detected.")]
+    match = re.search(r"cross\s+join", sql, re.IGNORECASE)
+    if match:
+        return [
+            Finding(
+                severity="WARN",
+                code="CROSS_JOIN",
+                message="CROSS JOIN detected.",
+                **text_range(sql, match.start(), match.end()),
+            )
+        ]
     return []
 
 
@@ -51,38 +75,66 @@ def check_suspect_join(sql: str, enabled: bool) -> List[Finding]:
         return []
     normalized = normalize_sql(sql)
     if " join " in normalized and " on " not in normalized and " using " not in normalized:
+        match = re.search(r"\bjoin\b", sql, re.IGNORECASE)
+        position = text_range(sql, match.start(), match.end()) if match else {}
         return [
             Finding(
                 severity="WARN",
                 code="SUSPECT_JOIN",
                 message="JOIN detected without ON/USING clause.",
+                **position,
             )
         ]
     return []
 
 
-def check_multi_statement(sql: str, block: bool) -> List[Finding]:
-    statements = split_statements(sql)
-    if len(statements) <= 1:
+def check_multi_statement(
+    sql: str, block: bool, spans: Optional[List[Tuple[int, int]]] = None
+) -> List[Finding]:
+    if spans is None:
+        spans = split_statement_spans(sql)
+    if len(spans) <= 1:
         return []
     severity = "ERROR" if block else "WARN"
-    return [Finding(severity=severity, code="MULTI_STATEMENT", message="Multiple statements detected.")]
+    start, end = spans[1]
+    return [
+        Finding(
+            severity=severity,
+            code="MULTI_STATEMENT",
+            message="Multiple statements detected.",
+            **text_range(sql, start, end),
+        )
+    ]
 
 
 def check_ddl_dml(sql: str, enabled: bool) -> List[Finding]:
     if not enabled:
         return []
-    if re.search(r"\b(delete|update|merge|create|drop|alter|truncate|insert)\b", sql, re.IGNORECASE):
-        return [Finding(severity="WARN", code="DDL_DML", message="DDL/DML statement detected.")]
+    match = re.search(r"\b(delete|update|merge|create|drop|alter|truncate|insert)\b", sql, re.IGNORECASE)
+    if match:
+        return [
+            Finding(
+                severity="WARN",
+                code="DDL_DML",
+                message="DDL/DML statement detected.",
+                **text_range(sql, match.start(), match.end()),
+            )
+        ]
     return []
 
 
 def run_policy_checks(sql: str, bytes_processed: int, policy: dict, limits: dict) -> List[Finding]:
     findings: List[Finding] = []
     findings.extend(check_bytes(bytes_processed, limits["warn_bytes"], limits["block_bytes"]))
+    findings.extend(run_statement_checks(sql, policy))
+    findings.extend(check_multi_statement(sql, policy.get("block_multi_statement", True)))
+    return findings
+
+
+def run_statement_checks(sql: str, policy: dict) -> List[Finding]:
+    findings: List[Finding] = []
     findings.extend(check_select_star(sql, policy.get("warn_select_star", True)))
     findings.extend(check_cross_join(sql, policy.get("warn_cross_join", True)))
     findings.extend(check_suspect_join(sql, policy.get("warn_suspect_join", True)))
-    findings.extend(check_multi_statement(sql, policy.get("block_multi_statement", True)))
     findings.extend(check_ddl_dml(sql, policy.get("warn_ddl_dml", True)))
     return findings
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .checks import check_multi_statement, run_statement_checks
+from .partition import enforce_partition_filters
+from .projection import advise_select_star
+from .sql_sanitize import extract_tables, split_statement_spans, text_range
+from .types import Finding
+
+
+def _shift(finding: Finding, line: int, column: int) -> Finding:
+    if finding.line is None:
+        return replace(finding, line=line, column=column, end_line=line, end_column=column + 1)
+    updates: Dict[str, Any] = {"line": finding.line + line, "end_line": (finding.end_line or 0) + line}
+    if finding.line == 0:
+        updates["column"] = (finding.column or 0) + column
+    if finding.end_line == 0:
+        updates["end_column"] = (finding.end_column or 0) + column
+    return replace(finding, **updates)
+
+
+def _meta_key(table: str, meta: Optional[Dict[str, Any]]) -> Tuple[Any, ...]:
+    if not meta:
+        return (table, None, None, None, None)
+    return (
+        table,
+        meta.get("partition_type"),
+        meta.get("partition_key"),
+        meta.get("ingestion_time"),
+        meta.get("num_bytes"),
+    )
+
+
+def merge_partition_summary(summary: Dict[str, Dict[str, object]], rows: List[Dict[str, object]]) -> None:
+    for row in rows:
+        table = str(row["table"])
+        if table not in summary or (summary[table]["ok"] and not row["ok"]):
+            summary[table] = row
+
+
+@dataclass(frozen=True)
+class _Checked:
+    meta_key: Optional[Tuple[Any, ...]] = None
+    partition_findings: List[Finding] = field(default_factory=list)
+    partition_summary: List[Dict[str, object]] = field(default_factory=list)
+    advice: List[Finding] = field(default_factory=list)
+
+
+class _Entry:
+    # findings/tables never change; metadata-dependent results are swapped in whole, so readers never see a mix.
+    __slots__ = ("findings", "tables", "checked")
+
+    def __init__(self, findings: List[Finding], tables: List[str]) -> None:
+        self.findings = findings
+        self.tables = tables
+        self.checked = _Checked()
+
+
+class StatementLinter:
+    def __init__(self, limit: int = 4096) -> None:
+        self.limit = limit
+        self.hits = 0
+        self.misses = 0
+        self._memo: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memo.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _entry(self, text: str, fingerprint: str, policy: Dict[str, Any]) -> _Entry:
+        key = hashlib.sha1(f"{fingerprint}\0{text}".encode("utf-8")).hexdigest()
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+        entry = _Entry(run_statement_checks(text, policy), sorted(extract_tables(text)))
+        with self._lock:
+            # Another thread may have checked the same statement meanwhile; keep the first entry.
+            known = self._memo.get(key)
+            if known is not None:
+                self.hits += 1
+                return known
+            self.misses += 1
+            self._memo[key] = entry
+            while len(self._memo) > self.limit:
+                del self._memo[next(iter(self._memo))]
+        return entry
+
+    def _walk(
+        self,
+        sql: str,
+        spans: List[Tuple[int, int]],
+        policy: Dict[str, Any],
+        table_meta: Dict[str, Dict[str, Any]],
+        exceptions: List[str],
+        enforce: bool,
+    ) -> Iterator[Tuple[int, int, _Entry, _Checked]]:
+        fingerprint = json.dumps([policy, exceptions, enforce], sort_keys=True, default=str)
+        line = 0
+        previous = 0
+        for start, end in spans:
+            line += sql.count("\n", previous, start)
+            previous = start
+            column = start - (sql.rfind("\n", 0, start) + 1)
+            text = sql[start:end]
+            entry = self._entry(text, fingerprint, policy)
+            checked = entry.checked
+            if entry.tables:
+                meta_key = tuple(_meta_key(table, table_meta.get(table)) for table in entry.tables)
+                if checked.meta_key != meta_key:
+                    partition_findings, partition_summary = enforce_partition_filters(
+                        text, entry.tables, table_meta, exceptions, enforce
+                    )
+                    advice = []
+                    if policy.get("warn_select_star", True):
+                        advice = advise_select_star(text, entry.tables, table_meta)
+                    checked = _Checked(meta_key, partition_findings, partition_summary, advice)
+                    with self._lock:
+                        entry.checked = checked
+            yield line, column, entry, checked
+
+    def lint(
+        self,
+        sql: str,
+        policy: Dict[str, Any],
+        table_meta: Dict[str, Dict[str, Any]],
+        exceptions: List[str],
+        enforce: bool,
+    ) -> Tuple[List[Finding], List[str], List[Dict[str, object]], int]:
+        findings: List[Finding] = []
+        tables: Dict[str, None] = {}
+        summary: Dict[str, Dict[str, object]] = {}
+        spans = split_statement_spans(sql)
+        for line, column, entry, checked in self._walk(sql, spans, policy, table_meta, exceptions, enforce):
+            if entry.tables:
+                merge_partition_summary(summary, checked.partition_summary)
+                tables.update(dict.fromkeys(entry.tables))
+            statement_findings = entry.findings + checked.partition_findings + checked.advice
+            findings.extend(_shift(finding, line, column) for finding in statement_findings)
+        findings.extend(check_multi_statement(sql, policy.get("block_multi_statement", True), spans))
+        return findings, list(tables), list(summary.values()), len(spans)
+
+    def lint_statements(
+        self,
+        sql: str,
+        spans: List[Tuple[int, int]],
+        policy: Dict[str, Any],
+        table_meta: Dict[str, Dict[str, Any]],
+        exceptions: List[str],
+        enforce: bool,
+    ) -> List[Dict[str, Any]]:
+        results = []
+        for (start, end), (line, column, entry, checked) in zip(
+            spans, self._walk(sql, spans, policy, table_meta, exceptions, enforce)
+        ):
+            statement_findings = entry.findings + checked.partition_findings + checked.advice
+            results.append(
+                {
+                    **text_range(sql, start, end),
+                    "tables": list(entry.tables),
+                    "findings": [_shift(finding, line, column) for finding in statement_findings],
+                    "partition_summary": list(checked.partition_summary),
+                }
+            )
+        return results
+
+
+LINTER = StatementLinter()
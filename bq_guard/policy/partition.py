@@ -3,9 +3,20 @@ from __future__ import annotations
 import re
 from typing import Dict, List, Tuple
 
+from .sql_sanitize import text_range
 from .types import Finding
 
 
+def _table_position(sql: str, table: str) -> Dict[str, int]:
+    start = sql.find(table)
+    if start >= 0:
+        return text_range(sql, start, start + len(table))
+    match = re.search(rf"\b{re.escape(table.split('.')[-1])}\b", sql)
+    if match:
+        return text_range(sql, match.start(), match.end())
+    return {}
+
+
 def enforce_partition_filters(
     sql: str,
     referenced_tables: List[str],
@@ -86,6 +97,7 @@ def enforce_partition_filters(
                     message=f"Partition filter missing for {table}.",
                     evidence=", ".join(required_keys),
                     table=table,
+                    **_table_position(sql, table),
                 )
             )
     return findings, summary
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .checks import bytes_human
+from .sql_sanitize import strip_literals, text_range
+from .types import Finding
+
+_STAR = re.compile(r"\bselect\s+(?:distinct\s+)?((?:`?[\w-]+`?\.)?\*)", re.IGNORECASE)
+_TOKEN = re.compile(r"[A-Za-z_]\w*")
+_MODIFIER = re.compile(r"\s*(except|replace)\s*\(", re.IGNORECASE)
+_LARGEST = 3
+
+
+def _scope(code: str, offset: int) -> Tuple[int, bool]:
+    depth = 0
+    for index in range(offset, len(code)):
+        if code[index] == "(":
+            depth += 1
+        elif code[index] == ")":
+            depth -= 1
+            if depth < 0:
+                return index, True
+    return len(code), False
+
+
+def _modifiers(code: str, offset: int) -> Tuple[int, str, Set[str]]:
+    # Skips EXCEPT(...)/REPLACE(...) after a star. Returns where they end, the REPLACE text (its columns
+    # are still read) and the EXCEPT-ed names.
+    replaced = ""
+    excluded: Set[str] = set()
+    while True:
+        match = _MODIFIER.match(code, offset)
+        if not match:
+            return offset, replaced, excluded
+        close, _ = _scope(code, match.end())
+        if match.group(1).lower() == "except":
+            excluded = {name.strip("` \n\t").lower() for name in code[match.end() : close].split(",")}
+        else:
+            replaced += " " + code[match.end() : close]
+        offset = close + 1
+
+
+def _star_finding(
+    table: str, columns: List[Dict[str, Any]], nested: bool, tokens: Set[str], star_range: Dict[str, int]
+) -> Optional[Finding]:
+    total = sum(column["bytes"] for column in columns)
+    if total <= 0:
+        return None
+    if not nested:
+        # The star is the query's output, so every column is needed; show where the bytes go.
+        largest = sorted(columns, key=lambda column: column["bytes"], reverse=True)[:_LARGEST]
+        listed = ", ".join(f"{column['name']} ({bytes_human(column['bytes'])})" for column in largest)
+        return Finding(
+            severity="WARN",
+            code="SELECT_STAR_COST",
+            message=f"SELECT * reads {len(columns)} columns of {table} (~{bytes_human(total)}); largest: {listed}.",
+            table=table,
+            **star_range,
+        )
+    used = [column for column in columns if column["name"].lower() in tokens]
+    if not used or len(used) == len(columns):
+        return None
+    saved = total - sum(column["bytes"] for column in used)
+    projection = ", ".join(column["name"] for column in used)
+    return Finding(
+        severity="WARN",
+        code="SELECT_STAR_COST",
+        message=f"Selecting {projection} instead of * from {table} saves ~{bytes_human(saved)} "
+        f"({saved * 100 // total}% of the table).",
+        evidence=projection,
+        table=table,
+        **star_range,
+    )
+
+
+def advise_select_star(sql: str, tables: List[str], table_meta: Dict[str, Dict[str, Any]]) -> List[Finding]:
+    sized = {table: table_meta[table]["columns"] for table in tables if (table_meta.get(table) or {}).get("columns")}
+    if not sized:
+        return []
+    code = strip_literals(sql)
+    stars = [(match, _scope(code, match.end(1))) for match in _STAR.finditer(code)]
+    findings: List[Finding] = []
+    seen: Set[str] = set()
+    for match, (end, nested) in stars:
+        modifiers_end, replaced, excluded = _modifiers(code, match.end(1))
+        if nested and any(
+            not match.start() <= other.start() < end for other, _ in stars if other is not match
+        ):
+            # Another star outside this subquery, e.g. the outer select or a later CTE, needs every column.
+            continue
+        scope = code[match.end(1) : end]
+        outside = code[: match.start(1)] + replaced + " " + code[modifiers_end:]
+        tokens = {token.lower() for token in _TOKEN.findall(outside)}
+        star_range = text_range(sql, match.start(1), modifiers_end)
+        for table, columns in sized.items():
+            if table in seen or table not in scope:
+                continue
+            read = [column for column in columns if column["name"].lower() not in excluded]
+            finding = _star_finding(table, read, nested, tokens, star_range)
+            if finding is not None:
+                findings.append(finding)
+                seen.add(table)
+    return findings
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+from .sql_sanitize import strip_literals
+
+_NAME_LIST = r"((?:[A-Za-z_]\w*\s*,\s*)*[A-Za-z_]\w*)"
+_DECLARE = re.compile(rf"^declare\s+{_NAME_LIST}", re.IGNORECASE)
+_SET = re.compile(rf"^set\s+\(?\s*{_NAME_LIST}", re.IGNORECASE)
+_CREATE = re.compile(
+    r"^create\s+(?:or\s+replace\s+)?(?:temp(?:orary)?\s+)?"
+    r"(?:table\s+function|materialized\s+view|table|view|function)\s+(?:if\s+not\s+exists\s+)?`?([\w.-]+)`?",
+    re.IGNORECASE,
+)
+# Procedural statements only make sense together with their block, so a script
+# that contains any of them is estimated as a single unit.
+_PROCEDURAL = re.compile(
+    r"^(?:begin|end|if|elseif|else|loop|while|repeat|for|call|execute\s+immediate|return|break|continue|"
+    r"leave|iterate|raise|exception)\b",
+    re.IGNORECASE,
+)
+_IDENTIFIER = re.compile(r"[A-Za-z_][\w-]*(?:\.[\w-]+)*")
+_KINDS = {
+    "select": "query",
+    "with": "query",
+    "declare": "variable",
+    "set": "variable",
+    "create": "ddl",
+    "drop": "ddl",
+    "alter": "ddl",
+    "insert": "dml",
+    "update": "dml",
+    "delete": "dml",
+    "merge": "dml",
+    "truncate": "dml",
+}
+
+
+@dataclass
+class ScriptUnit:
+    statements: List[int]
+    sql: str
+
+
+@dataclass
+class ScriptPlan:
+    spans: List[Tuple[int, int]]
+    kinds: List[str]
+    units: List[ScriptUnit] = field(default_factory=list)
+    procedural: bool = False
+
+
+def statement_kind(text: str) -> str:
+    keyword = strip_literals(text).lstrip("( \t\r\n").split(None, 1)
+    return _KINDS.get(keyword[0].lower(), "other") if keyword else "other"
+
+
+def _defines(code: str) -> Set[str]:
+    for pattern in (_DECLARE, _SET):
+        match = pattern.match(code)
+        if match:
+            return {name.strip().lower() for name in match.group(1).split(",")}
+    match = _CREATE.match(code)
+    return {match.group(1).lower()} if match else set()
+
+
+def _references(code: str) -> Set[str]:
+    found: Set[str] = set()
+    for token in _IDENTIFIER.findall(code.replace("`", "")):
+        parts = token.lower().split(".")
+        found.update(".".join(parts[index:]) for index in range(len(parts)))
+    return found
+
+
+def plan_script(sql: str, spans: List[Tuple[int, int]]) -> ScriptPlan:
+    codes = [strip_literals(sql[start:end]).strip() for start, end in spans]
+    plan = ScriptPlan(spans=spans, kinds=[statement_kind(sql[start:end]) for start, end in spans])
+    if any(_PROCEDURAL.match(code) for code in codes):
+        plan.procedural = True
+        plan.units = [ScriptUnit(list(range(len(spans))), sql)]
+        return plan
+
+    parent = list(range(len(spans)))
+
+    def root(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    definers: Dict[str, List[int]] = {}
+    for index, code in enumerate(codes):
+        defined = _defines(code)
+        for name in _references(code) | defined:
+            for earlier in definers.get(name, ()):
+                parent[root(index)] = root(earlier)
+        for name in defined:
+            definers.setdefault(name, []).append(index)
+
+    groups: Dict[int, List[int]] = {}
+    for index in range(len(spans)):
+        groups.setdefault(root(index), []).append(index)
+    for members in sorted(groups.values()):
+        text = ";\n".join(sql[spans[index][0]:spans[index][1]] for index in members)
+        plan.units.append(ScriptUnit(members, text))
+    return plan
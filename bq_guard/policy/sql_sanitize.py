@@ -1,16 +1,90 @@
 from __future__ import annotations
 
 import re
-from typing import List
+from typing import Dict, List, Tuple
+
+# Tokens that can hide a ";" from the splitter: string literals, quoted identifiers and comments.
+_SKIP_OR_SEMICOLON = re.compile(
+    r"""
+    '''.*?'''
+    | \"\"\".*?\"\"\"
+    | '(?:\\.|[^'\\\n])*'
+    | "(?:\\.|[^"\\\n])*"
+    | `[^`]*`
+    | --[^\n]*
+    | \#[^\n]*
+    | /\*.*?\*/
+    | ;
+    """,
+    re.VERBOSE | re.DOTALL,
+)
 
 
 def normalize_sql(sql: str) -> str:
     return re.sub(r"\s+", " ", sql).strip().lower()
 
 
+def strip_literals(sql: str) -> str:
+    # Blanks out string literals and comments, keeping offsets and quoted identifiers.
+    def blank(match: "re.Match[str]") -> str:
+        token = match.group(0)
+        return token if token.startswith("`") or token == ";" else re.sub(r"[^\n]", " ", token)
+
+    return _SKIP_OR_SEMICOLON.sub(blank, sql)
+
+
+def canonical_sql(sql: str) -> str:
+    # Collapses whitespace and drops comments, but keeps literals and case intact.
+    out: List[str] = []
+    code: List[str] = []
+    previous = 0
+    for match in _SKIP_OR_SEMICOLON.finditer(sql):
+        token = match.group(0)
+        code.append(sql[previous:match.start()])
+        previous = match.end()
+        if token.startswith(("--", "#", "/*")) or token == ";":
+            code.append(" " if token != ";" else ";")
+            continue
+        out.append(re.sub(r"\s+", " ", "".join(code)))
+        out.append(token)
+        code = []
+    code.append(sql[previous:])
+    out.append(re.sub(r"\s+", " ", "".join(code)))
+    return "".join(out).strip(" ;")
+
+
+def split_statement_spans(sql: str) -> List[Tuple[int, int]]:
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    for match in _SKIP_OR_SEMICOLON.finditer(sql):
+        if sql[match.start()] == ";":
+            spans.append((start, match.start()))
+            start = match.end()
+    spans.append((start, len(sql)))
+    result = []
+    for begin, end in spans:
+        text = sql[begin:end]
+        stripped = text.strip()
+        if stripped:
+            offset = begin + (len(text) - len(text.lstrip()))
+            result.append((offset, offset + len(stripped)))
+    return result
+
+
 def split_statements(sql: str) -> List[str]:
-    parts = [s.strip() for s in sql.split(";")]
-    return [p for p in parts if p]
+    return [sql[start:end] for start, end in split_statement_spans(sql)]
+
+
+def offset_to_position(sql: str, offset: int) -> Tuple[int, int]:
+    line = sql.count("\n", 0, offset)
+    column = offset - (sql.rfind("\n", 0, offset) + 1)
+    return line, column
+
+
+def text_range(sql: str, start: int, end: int) -> Dict[str, int]:
+    line, column = offset_to_position(sql, start)
+    end_line, end_column = offset_to_position(sql, end)
+    return {"line": line, "column": column, "end_line": end_line, "end_column": end_column}
 
 
 def extract_tables(sql: str) -> List[str]:
@@ -18,5 +92,15 @@ def extract_tables(sql: str) -> List[str]:
     return list({match.group(1) for match in pattern.finditer(sql)})
 
 
+_SOURCE_TABLE = re.compile(
+    r"`([\w-]+\.[\w-]+\.[\w-]+)`|\b(?:from|join)\s+([\w-]+\.[\w-]+\.[\w-]+)\b", re.IGNORECASE
+)
+
+
+def source_tables(sql: str) -> List[str]:
+    # Stricter than extract_tables: skips struct paths and anything inside literals or comments.
+    return sorted({match.group(1) or match.group(2) for match in _SOURCE_TABLE.finditer(strip_literals(sql))})
+
+
 def contains_word(sql: str, word: str) -> bool:
     return re.search(rf"\b{re.escape(word)}\b", sql, re.IGNORECASE) is not None
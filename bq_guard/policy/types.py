@@ -11,3 +11,7 @@ class Finding:
     message: str
     evidence: Optional[str] = None
     table: Optional[str] = None
+    line: Optional[int] = None
+    column: Optional[int] = None
+    end_line: Optional[int] = None
+    end_column: Optional[int] = None
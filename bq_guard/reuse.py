@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import get_history_path
+from .history import HistoryFollower, entry_time
+from .policy.sql_sanitize import canonical_sql, strip_literals
+
+# BigQuery's own result cache refuses these too: the same text can return different rows on every run.
+_VOLATILE = re.compile(
+    r"\b(?:current_(?:date|datetime|time|timestamp)|rand|generate_uuid|session_user|"
+    r"information_schema|__tables__|__partitions_summary__)\b",
+    re.IGNORECASE,
+)
+
+
+def is_reusable_sql(sql: str) -> bool:
+    return _VOLATILE.search(strip_literals(sql)) is None
+
+
+def result_key(project: Optional[str], sql: str) -> str:
+    return hashlib.sha1(f"{project}\0{canonical_sql(sql)}".encode("utf-8")).hexdigest()
+
+
+class ResultIndex:
+    def __init__(self, path: str, per_key: int = 5) -> None:
+        self.path = path
+        self.per_key = per_key
+        self.entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._follower = HistoryFollower(path, self._add, self.entries.clear)
+
+    def refresh(self) -> None:
+        self._follower.refresh()
+
+    def _add(self, entry: Dict[str, Any]) -> None:
+        if entry.get("status") != "EXECUTED" or not entry.get("job_id") or not entry.get("sql"):
+            return
+        runs = self.entries.setdefault(result_key(entry.get("project"), entry["sql"]), [])
+        runs.append({"job_id": entry["job_id"], "location": entry.get("location"), "ts": entry.get("ts")})
+        del runs[: -self.per_key]
+
+    def candidates(self, project: Optional[str], sql: str, window_s: float) -> List[Dict[str, Any]]:
+        self.refresh()
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=window_s)
+        fresh = []
+        for run in reversed(self.entries.get(result_key(project, sql), [])):
+            executed_at = entry_time(run)
+            if executed_at is not None and executed_at >= cutoff:
+                fresh.append(run)
+        return fresh
+
+
+_indexes: Dict[str, ResultIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def load_result_index() -> ResultIndex:
+    path = get_history_path()
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = ResultIndex(path)
+            _indexes[path] = index
+        return index
+
+
+def find_reusable(
+    check: Callable[[str, Optional[str]], Optional[Dict[str, Any]]],
+    project: Optional[str],
+    sql: str,
+    window_s: float,
+) -> Optional[Dict[str, Any]]:
+    if not is_reusable_sql(sql):
+        return None
+    for run in load_result_index().candidates(project, sql, window_s):
+        reusable = check(run["job_id"], run["location"])
+        if reusable:
+            return reusable
+    return None
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Start = Callable[[], Dict[str, Any]]
+IsDone = Callable[[Dict[str, Any]], bool]
+
+_FINISHED = {"DONE", "FAILED", "CANCELLED"}
+_KEEP_TICKETS = 256
+
+
+class HostSlots:
+    # flock'd files in a directory every user on the host can reach; the kernel drops a lock when its holder exits.
+    def __init__(self, directory: Optional[str]) -> None:
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "bq_guard-slots")
+
+    def _prepare(self) -> None:
+        try:
+            os.mkdir(self.directory, 0o1777)
+            os.chmod(self.directory, 0o1777)
+        except FileExistsError:
+            pass
+
+    def acquire(self, project: Optional[str], limit: int) -> Optional[int]:
+        try:
+            import fcntl
+        except ImportError:
+            return -1
+        self._prepare()
+        name = re.sub(r"[^\w.-]", "_", project or "default")
+        for index in range(limit):
+            path = os.path.join(self.directory, f"{name}.{index}.lock")
+            try:
+                fd = os.open(path, os.O_RDONLY | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o444)
+            except OSError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except OSError:
+                os.close(fd)
+        return None
+
+    def release(self, fd: Optional[int]) -> None:
+        if fd is not None and fd >= 0:
+            os.close(fd)
+
+
+class Ticket:
+    def __init__(
+        self, ticket_id: str, project: Optional[str], bytes_estimate: Optional[int], priority: int, small: bool
+    ) -> None:
+        self.ticket_id = ticket_id
+        self.project = project
+        self.bytes_estimate = bytes_estimate
+        self.priority = priority
+        self.small = small
+        self.state = "QUEUED"
+        self.enqueued = time.monotonic()
+        self.started: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.start: Optional[Start] = None
+        self.is_done: Optional[IsDone] = None
+        self.slot: Optional[int] = None
+
+
+class ExecutionScheduler:
+    def __init__(
+        self, max_running: int, small_bytes: int, poll_s: float = 2.0, slot_dir: Optional[str] = None
+    ) -> None:
+        self.max_running = max(1, int(max_running))
+        self.small_bytes = int(small_bytes)
+        self.poll_s = float(poll_s)
+        self.slots = HostSlots(slot_dir)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._queues: Dict[Optional[str], List[Tuple[Tuple[int, bool, int], Ticket]]] = {}
+        self._running: Dict[Optional[str], List[Ticket]] = {}
+        self._tickets: Dict[str, Ticket] = {}
+        self._watcher: Optional[threading.Thread] = None
+
+    def submit(
+        self,
+        project: Optional[str],
+        bytes_estimate: Optional[int],
+        priority: int,
+        start: Start,
+        is_done: IsDone,
+    ) -> Ticket:
+        # Unknown sizes queue with the big jobs; small interactive queries go first within a priority.
+        small = bytes_estimate is not None and bytes_estimate < self.small_bytes
+        ticket = Ticket(f"q{next(self._ids)}", project, bytes_estimate, int(priority), small)
+        ticket.start = start
+        ticket.is_done = is_done
+        with self._lock:
+            finished = [key for key, known in self._tickets.items() if known.state in _FINISHED]
+            for key in finished[: max(0, len(self._tickets) - _KEEP_TICKETS)]:
+                del self._tickets[key]
+            self._tickets[ticket.ticket_id] = ticket
+            heapq.heappush(
+                self._queues.setdefault(project, []), ((-ticket.priority, not small, next(self._ids)), ticket)
+            )
+            full = len(self._running.get(project) or []) >= self.max_running
+        if full:
+            # Jobs often finish between watcher polls; check now rather than queue behind a finished one.
+            self._reap([ticket for ticket in self._running.get(project) or [] if ticket.state == "RUNNING"])
+        self._pump(project)
+        return ticket
+
+    def _pump(self, project: Optional[str]) -> None:
+        while True:
+            with self._lock:
+                queue = self._queues.get(project) or []
+                running = self._running.setdefault(project, [])
+                if not queue or len(running) >= self.max_running:
+                    return
+                # Slots are shared with every other daemon on the host, whoever runs it.
+                slot = self.slots.acquire(project, self.max_running)
+                if slot is None:
+                    self._ensure_watcher()
+                    return
+                _, ticket = heapq.heappop(queue)
+                ticket.state = "STARTING"
+                ticket.slot = slot
+                running.append(ticket)
+            self._start(ticket)
+
+    def _start(self, ticket: Ticket) -> None:
+        assert ticket.start is not None
+        ticket.started = time.monotonic()
+        try:
+            result = ticket.start()
+        except Exception as exc:
+            with self._lock:
+                ticket.state = "FAILED"
+                ticket.error = str(exc)
+                self._running[ticket.project].remove(ticket)
+                self.slots.release(ticket.slot)
+            self._pump(ticket.project)
+            return
+        with self._lock:
+            ticket.result = result
+            ticket.state = "RUNNING"
+            self._ensure_watcher()
+
+    def _ensure_watcher(self) -> None:
+        if self._watcher is None or not self._watcher.is_alive():
+            self._watcher = threading.Thread(target=self._watch, name="bq_guard-scheduler", daemon=True)
+            self._watcher.start()
+
+    def _watch(self) -> None:
+        while True:
+            time.sleep(self.poll_s)
+            with self._lock:
+                tickets = [ticket for running in self._running.values() for ticket in running]
+                running = [ticket for ticket in tickets if ticket.state == "RUNNING"]
+                waiting = [project for project, queue in self._queues.items() if queue]
+                if not tickets and not waiting:
+                    self._watcher = None
+                    return
+            self._reap(running)
+            # Slots held by other processes free up without telling us; retry the queues on every tick.
+            for project in waiting:
+                self._pump(project)
+
+    def _reap(self, running: List[Ticket]) -> None:
+        for ticket in running:
+            assert ticket.is_done is not None and ticket.result is not None
+            try:
+                done = ticket.is_done(ticket.result)
+            except Exception:
+                done = True
+            if done:
+                self._finish(ticket)
+
+    def _finish(self, ticket: Ticket) -> None:
+        with self._lock:
+            if ticket.state != "RUNNING":
+                return
+            ticket.state = "DONE"
+            self._running[ticket.project].remove(ticket)
+            self.slots.release(ticket.slot)
+        self._pump(ticket.project)
+
+    def cancel(self, ticket_id: str) -> bool:
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+            if ticket is None or ticket.state != "QUEUED":
+                return False
+            queue = self._queues[ticket.project]
+            queue[:] = [item for item in queue if item[1] is not ticket]
+            heapq.heapify(queue)
+            ticket.state = "CANCELLED"
+            return True
+
+    def status(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+            if ticket is None:
+                return None
+            position = None
+            if ticket.state == "QUEUED":
+                ordered = sorted(self._queues[ticket.project], key=lambda item: item[0])
+                position = next(index for index, item in enumerate(ordered) if item[1] is ticket) + 1
+            waited = (ticket.started or time.monotonic()) - ticket.enqueued
+            return {
+                "ticket": ticket.ticket_id,
+                "state": ticket.state,
+                "position": position,
+                "waited_ms": int(waited * 1000),
+                "running": len(self._running.get(ticket.project) or []),
+                "max_running": self.max_running,
+                "result": ticket.result,
+                "error": ticket.error,
+            }
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            projects = set(self._queues) | set(self._running)
+            return {
+                str(project): {
+                    "queued": len(self._queues.get(project) or []),
+                    "running": len(self._running.get(project) or []),
+                }
+                for project in projects
+            }
+
+
+_scheduler: Optional[ExecutionScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(settings: Dict[str, Any]) -> ExecutionScheduler:
+    global _scheduler
+    # One queue per process; the running cap itself is enforced host-wide through HostSlots.
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ExecutionScheduler(
+                settings["max_running_per_project"], settings["small_bytes"], settings["poll_s"], settings["slot_dir"]
+            )
+        else:
+            _scheduler.max_running = max(1, int(settings["max_running_per_project"]))
+            _scheduler.small_bytes = int(settings["small_bytes"])
+            _scheduler.poll_s = float(settings["poll_s"])
+            _scheduler.slots = HostSlots(settings["slot_dir"])
+        return _scheduler
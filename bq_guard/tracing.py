@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+# OTLP enum values: SPAN_KIND_INTERNAL, STATUS_CODE_OK, STATUS_CODE_ERROR.
+_KIND_INTERNAL = 1
+_STATUS_OK = 1
+_STATUS_ERROR = 2
+
+_current: contextvars.ContextVar[Optional["Tracer"]] = contextvars.ContextVar("bq_guard_tracer", default=None)
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = self.start_ns
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def to_otel(self, trace_id: str) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "traceId": trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": _KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _any_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": _STATUS_OK} if self.error is None else {"code": _STATUS_ERROR, "message": self.error},
+        }
+        if self.parent_id is not None:
+            data["parentSpanId"] = self.parent_id
+        return data
+
+
+def _any_value(value: Any) -> Dict[str, Any]:
+    # OTLP/JSON AnyValue; 64-bit integers travel as strings.
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": value if isinstance(value, str) else json.dumps(value, default=str)}
+
+
+class Tracer:
+    def __init__(self, op: Optional[str]) -> None:
+        self.op = op or "unknown"
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self._stack: List[Span] = []
+        self._root = Span(f"bq_guard.{self.op}", None, {"op": self.op})
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        parent = self._stack[-1] if self._stack else self._root
+        item = Span(name, parent.span_id, attributes)
+        self._stack.append(item)
+        try:
+            yield item
+        except BaseException as exc:
+            item.error = str(exc) or type(exc).__name__
+            raise
+        finally:
+            item.end_ns = time.time_ns()
+            self._stack.pop()
+            self.spans.append(item)
+
+    def finish(self) -> None:
+        self._root.end_ns = time.time_ns()
+
+    @property
+    def total_ms(self) -> float:
+        return self._root.duration_ms
+
+    def timings(self) -> Dict[str, Any]:
+        stages: Dict[str, float] = {}
+        for item in self.spans:
+            stages[item.name] = round(stages.get(item.name, 0.0) + item.duration_ms, 3)
+        return {"total_ms": round(self.total_ms, 3), "stages": stages}
+
+    def to_otlp(self) -> Dict[str, Any]:
+        # One ExportTraceServiceRequest per trace, the line format the collector's otlpjsonfile receiver reads.
+        spans = [item.to_otel(self.trace_id) for item in [self._root, *self.spans]]
+        resource = {"attributes": [{"key": "service.name", "value": {"stringValue": "bq-guard"}}]}
+        scope_spans = [{"scope": {"name": "bq_guard"}, "spans": spans}]
+        return {"resourceSpans": [{"resource": resource, "scopeSpans": scope_spans}]}
+
+    def export(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(self.to_otlp(), ensure_ascii=False) + "\n")
+
+
+@contextlib.contextmanager
+def start_trace(op: Optional[str]) -> Iterator[Tracer]:
+    tracer = Tracer(op)
+    token = _current.set(tracer)
+    try:
+        yield tracer
+    finally:
+        tracer.finish()
+        _current.reset(token)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    tracer = _current.get()
+    if tracer is None:
+        yield None
+        return
+    with tracer.span(name, **attributes) as item:
+        yield item
+
+
+class OpStats:
+    def __init__(self, window: int = 500) -> None:
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, op: str, duration_ms: float) -> None:
+        with self._lock:
+            samples = self._samples.get(op)
+            if samples is None or samples.maxlen != self.window:
+                samples = deque(samples or [], maxlen=self.window)
+                self._samples[op] = samples
+            samples.append(duration_ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            data = {op: sorted(samples) for op, samples in self._samples.items()}
+        return {
+            op: {
+                "count": len(values),
+                "p50_ms": round(_percentile(values, 0.50), 3),
+                "p95_ms": round(_percentile(values, 0.95), 3),
+                "max_ms": round(values[-1], 3),
+            }
+            for op, values in data.items()
+            if values
+        }
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    index = min(len(values) - 1, max(0, int(round(fraction * (len(values) - 1)))))
+    return values[index]
+
+
+OP_STATS = OpStats()
@@ -1,5 +1,25 @@
 import * as vscode from 'vscode';
 
+export interface Finding {
+  severity: string;
+  message: string;
+  code: string;
+  line?: number | null;
+  column?: number | null;
+  end_line?: number | null;
+  end_column?: number | null;
+}
+
+function findingRange(finding: Finding): vscode.Range {
+  if (finding.line === null || finding.line === undefined) {
+    return new vscode.Range(new vscode.Position(0, 0), new vscode.Position(0, 1));
+  }
+  const column = finding.column ?? 0;
+  const endLine = finding.end_line ?? finding.line;
+  const endColumn = finding.end_column ?? column + 1;
+  return new vscode.Range(new vscode.Position(finding.line, column), new vscode.Position(endLine, endColumn));
+}
+
 export class DiagnosticsManager {
   private collection: vscode.DiagnosticCollection;
   private uri: vscode.Uri;
@@ -9,10 +29,10 @@ export class DiagnosticsManager {
     this.uri = vscode.Uri.parse('bqguard:/query.sql');
   }
 
-  update(findings: Array<{ severity: string; message: string; code: string }>): void {
+  update(findings: Finding[]): void {
     const diagnostics: vscode.Diagnostic[] = [];
     findings.forEach((finding) => {
-      const range = new vscode.Range(new vscode.Position(0, 0), new vscode.Position(0, 1));
+      const range = findingRange(finding);
       const severity = finding.severity === 'ERROR'
         ? vscode.DiagnosticSeverity.Error
         : vscode.DiagnosticSeverity.Warning;
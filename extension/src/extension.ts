@@ -6,7 +6,12 @@ import { GuardPanel } from './webview/panel';
 import { CommandRegistry } from './commands';
 
 export function activate(context: vscode.ExtensionContext) {
-  const bridge = new PythonBridge();
+  const settings = vscode.workspace.getConfiguration('bqGuard');
+  const bridge = new PythonBridge({
+    pythonPath: settings.get<string>('pythonPath', 'python'),
+    sharedDaemon: settings.get<boolean>('sharedDaemon', false),
+  });
+  void bridge.start().catch(() => undefined);
   const state = new GuardStateMachine();
   const diagnostics = new DiagnosticsManager();
 
@@ -1,50 +1,215 @@
 import { ChildProcessWithoutNullStreams, spawn } from 'child_process';
+import { createReadStream, promises as fs } from 'fs';
+import * as net from 'net';
+import * as os from 'os';
+import * as path from 'path';
 import * as readline from 'readline';
+import { Readable, Writable } from 'stream';
 
 interface PendingRequest {
   resolve: (value: any) => void;
   reject: (err: Error) => void;
+  onChunk?: (chunk: any) => void;
+  loaded: Promise<void>;
+}
+
+export interface BridgeOptions {
+  pythonPath: string;
+  sharedDaemon: boolean;
+}
+
+const CONNECT_ATTEMPTS = 50;
+const CONNECT_DELAY_MS = 100;
+// Ops whose rows may come back as a handle to a payload file instead of inline JSON.
+const SIDE_CHANNEL_OPS = new Set(['fetch_preview', 'fetch_page']);
+
+export function defaultSocketPath(): string {
+  const runtimeDir = process.env.XDG_RUNTIME_DIR || os.tmpdir();
+  return path.join(runtimeDir, `bq_guard-${os.userInfo().uid}`, 'daemon.sock');
+}
+
+// The socket directory may sit in a shared /tmp; only trust it if we own it and nobody else can enter it.
+async function isPrivateDir(dir: string): Promise<boolean> {
+  try {
+    const info = await fs.lstat(dir);
+    return info.isDirectory() && info.uid === os.userInfo().uid && (info.mode & 0o777) === 0o700;
+  } catch {
+    return false;
+  }
 }
 
 export class PythonBridge {
   private process: ChildProcessWithoutNullStreams | null = null;
-  private pending: PendingRequest[] = [];
+  private socket: net.Socket | null = null;
+  private input: Writable | null = null;
+  private starting: Promise<void> | null = null;
+  private pending = new Map<number, PendingRequest>();
+  private nextId = 1;
+  private readonly channel = `${process.pid}-${Date.now().toString(36)}`;
 
-  start(): void {
-    if (this.process) {
-      return;
+  constructor(private options: BridgeOptions = { pythonPath: 'python', sharedDaemon: false }) {}
+
+  start(): Promise<void> {
+    if (!this.starting) {
+      this.starting = (this.options.sharedDaemon ? this.connectDaemon() : Promise.resolve(this.spawnProcess()))
+        .then(() => {
+          void this.sendRequest({ op: 'warmup' }).catch(() => undefined);
+        })
+        .catch((err) => {
+          this.starting = null;
+          throw err;
+        });
     }
-    this.process = spawn('python', ['-m', 'bq_guard.cli'], { stdio: 'pipe' });
-    const rl = readline.createInterface({ input: this.process.stdout });
-    rl.on('line', (line) => {
-      const pending = this.pending.shift();
-      if (!pending) {
+    return this.starting;
+  }
+
+  async sendRequest(payload: Record<string, any>, onChunk?: (chunk: any) => void): Promise<any> {
+    await this.start();
+    return new Promise((resolve, reject) => {
+      if (!this.input) {
+        reject(new Error('Python bridge is not connected.'));
         return;
       }
+      const id = this.nextId++;
+      const request = SIDE_CHANNEL_OPS.has(payload.op) ? { ...payload, side_channel: this.channel } : payload;
+      this.pending.set(id, { resolve, reject, onChunk, loaded: Promise.resolve() });
+      this.input.write(`${JSON.stringify({ ...request, id })}\n`);
+    });
+  }
+
+  private spawnProcess(): void {
+    const child = spawn(this.options.pythonPath, ['-m', 'bq_guard.cli'], { stdio: 'pipe' });
+    this.process = child;
+    this.attach(child.stdout, child.stdin);
+    child.on('error', (err) => this.failPending(err));
+    child.on('exit', () => {
+      this.process = null;
+      this.reset(new Error('Python process exited.'));
+    });
+  }
+
+  private async connectDaemon(): Promise<void> {
+    const socketPath = defaultSocketPath();
+    const socketDir = path.dirname(socketPath);
+    let socket = (await isPrivateDir(socketDir)) ? await this.tryConnect(socketPath) : null;
+    if (!socket) {
+      const daemon = spawn(
+        this.options.pythonPath,
+        ['-m', 'bq_guard.cli', '--serve', '--socket', socketPath],
+        { detached: true, stdio: 'ignore' }
+      );
+      daemon.unref();
+      for (let attempt = 0; attempt < CONNECT_ATTEMPTS && !socket; attempt += 1) {
+        await new Promise((resolve) => setTimeout(resolve, CONNECT_DELAY_MS));
+        if (await isPrivateDir(socketDir)) {
+          socket = await this.tryConnect(socketPath);
+        }
+      }
+    }
+    if (!socket) {
+      // Fall back to a private child process rather than failing the request.
+      this.spawnProcess();
+      return;
+    }
+    this.socket = socket;
+    this.attach(socket, socket);
+    socket.on('error', (err) => this.failPending(err));
+    socket.on('close', () => {
+      this.socket = null;
+      this.reset(new Error('Daemon connection closed.'));
+    });
+  }
+
+  private tryConnect(socketPath: string): Promise<net.Socket | null> {
+    return new Promise((resolve) => {
+      const socket = net.createConnection(socketPath);
+      socket.once('connect', () => resolve(socket));
+      socket.once('error', () => {
+        socket.destroy();
+        resolve(null);
+      });
+    });
+  }
+
+  private attach(output: Readable, input: Writable): void {
+    this.input = input;
+    const rl = readline.createInterface({ input: output });
+    rl.on('line', (line) => {
+      let parsed: any;
       try {
-        const parsed = JSON.parse(line);
-        pending.resolve(parsed);
+        parsed = JSON.parse(line);
       } catch (err) {
-        pending.reject(err as Error);
+        return;
       }
-    });
-    this.process.on('error', (err) => {
-      while (this.pending.length) {
-        this.pending.shift()?.reject(err);
+      const pending = this.pending.get(parsed.id);
+      if (!pending) {
+        return;
       }
+      // Payload reads are async; chain them so chunks and the final reply keep their order.
+      if (parsed.chunk !== undefined) {
+        pending.loaded = pending.loaded
+          .then(() => this.loadRows(parsed.chunk))
+          .then(() => pending.onChunk?.(parsed.chunk));
+        return;
+      }
+      this.pending.delete(parsed.id);
+      pending.loaded
+        .then(() => this.loadRows(parsed.page ?? parsed.preview))
+        .then(() => pending.resolve(parsed), pending.reject);
     });
   }
 
-  sendRequest(payload: Record<string, any>): Promise<any> {
-    this.start();
-    return new Promise((resolve, reject) => {
-      this.pending.push({ resolve, reject });
-      this.process?.stdin.write(`${JSON.stringify(payload)}\n`);
+  private async loadRows(container: any): Promise<void> {
+    const handle = container?.rows_handle;
+    if (!handle) {
+      return;
+    }
+    const payloadDir = path.join(path.dirname(defaultSocketPath()), 'payloads');
+    if (path.dirname(path.resolve(handle.path)) !== payloadDir || !(await isPrivateDir(payloadDir))) {
+      throw new Error(`Refusing payload outside ${payloadDir}.`);
+    }
+    // One row per line: parse as the file streams in instead of buffering and parsing one big blob.
+    const rows: any[] = [];
+    const lines = readline.createInterface({
+      input: createReadStream(handle.path, {
+        start: handle.offset,
+        end: handle.offset + handle.length - 1,
+        encoding: 'utf8',
+      }),
+      crlfDelay: Infinity,
     });
+    try {
+      for await (const line of lines) {
+        if (line) {
+          rows.push(JSON.parse(line));
+        }
+      }
+    } finally {
+      lines.close();
+      void this.sendRequest({ op: 'release_payload', handle: handle.handle }).catch(() => undefined);
+    }
+    container.rows = rows;
+    delete container.rows_handle;
+  }
+
+  private failPending(err: Error): void {
+    const pending = Array.from(this.pending.values());
+    this.pending.clear();
+    pending.forEach((request) => request.reject(err));
+  }
+
+  private reset(err: Error): void {
+    this.input = null;
+    this.starting = null;
+    this.failPending(err);
   }
 
   dispose(): void {
+    this.socket?.end();
+    this.socket = null;
     this.process?.kill();
     this.process = null;
+    this.input = null;
+    this.starting = null;
   }
 }
@@ -6,6 +6,7 @@ export class GuardStateMachine {
   private _reviewRevision: number | null = null;
   private _currentSql = '';
   private _jobId: string | null = null;
+  private _jobLocation: string | null = null;
 
   get state(): GuardState {
     return this._state;
@@ -27,6 +28,10 @@ export class GuardStateMachine {
     return this._jobId;
   }
 
+  get jobLocation(): string | null {
+    return this._jobLocation;
+  }
+
   updateSql(sql: string): void {
     this._currentSql = sql;
     this._revision += 1;
@@ -46,7 +51,8 @@ export class GuardStateMachine {
     return this._reviewRevision !== null && this._reviewRevision === this._revision;
   }
 
-  setJob(jobId: string | null): void {
+  setJob(jobId: string | null, location: string | null = null): void {
     this._jobId = jobId;
+    this._jobLocation = location;
   }
 }
@@ -3,8 +3,15 @@
   let debounceMs = 900;
   let debounceHandle = null;
   let latestEstimate = null;
+  let latestReuse = null;
+  let latestBudget = null;
   let latestHuman = '';
-  let pageToken = null;
+  const COLUMN_WINDOW = 50;
+  let pageStart = 0;
+  let pageSize = 0;
+  let nextStart = null;
+  let columnOffset = 0;
+  let allColumns = [];
 
   const root = document.getElementById('root');
 
@@ -21,7 +28,7 @@
             <div>Location: <span id="location">-</span></div>
             <div>Bytes: <span id="bytes">-</span></div>
             <div>WARN: <span id="warnCount">0</span> / ERROR: <span id="errorCount">0</span></div>
-            <div>Status: <span id="state">Idle</span></div>
+            <div>Status: <span id="state">Idle</span> <button id="cancelQueued" class="hidden">Cancel</button></div>
           </div>
         </header>
         <div class="body">
@@ -35,6 +42,8 @@
             <div id="partitionSummary"></div>
             <h3>Referenced Tables</h3>
             <ul id="tables"></ul>
+            <h3>Statements</h3>
+            <div id="statements"></div>
           </aside>
         </div>
         <div class="tabs">
@@ -49,6 +58,8 @@
           <div class="paging">
             <button id="prevPage">Prev</button>
             <button id="nextPage">Next</button>
+            <button id="prevColumns">&lt; Columns</button>
+            <button id="nextColumns">Columns &gt;</button>
             <span id="pageInfo"></span>
           </div>
           <div id="allTable" class="table"></div>
@@ -66,6 +77,7 @@
             </div>
             <div class="modal-actions">
               <button id="cancelReview">Cancel</button>
+              <button id="reuseButton" class="hidden">Reuse previous result</button>
               <button id="executeButton" class="primary" disabled>Execute</button>
             </div>
           </div>
@@ -111,7 +123,15 @@
       });
     });
 
+    document.getElementById('cancelQueued').addEventListener('click', () => {
+      vscode.postMessage({ type: 'cancelQueued' });
+    });
+
     document.getElementById('cancelReview').addEventListener('click', closeReview);
+    document.getElementById('reuseButton').addEventListener('click', () => {
+      vscode.postMessage({ type: 'execute', reuse: latestReuse });
+      closeReview();
+    });
     document.getElementById('executeButton').addEventListener('click', () => {
       vscode.postMessage({ type: 'execute' });
       closeReview();
@@ -119,10 +139,20 @@
     document.getElementById('confirmInput').addEventListener('input', handleConfirmInput);
 
     document.getElementById('prevPage').addEventListener('click', () => {
-      vscode.postMessage({ type: 'fetchPage', pageToken: null });
+      requestPage(Math.max(0, pageStart - pageSize), columnOffset);
     });
     document.getElementById('nextPage').addEventListener('click', () => {
-      vscode.postMessage({ type: 'fetchPage', pageToken });
+      if (nextStart !== null) {
+        requestPage(nextStart, columnOffset);
+      }
+    });
+    document.getElementById('prevColumns').addEventListener('click', () => {
+      requestPage(pageStart, Math.max(0, columnOffset - COLUMN_WINDOW));
+    });
+    document.getElementById('nextColumns').addEventListener('click', () => {
+      if (columnOffset + COLUMN_WINDOW < allColumns.length) {
+        requestPage(pageStart, columnOffset + COLUMN_WINDOW);
+      }
     });
 
     document.getElementById('exportPreview').addEventListener('click', () => {
@@ -142,24 +172,76 @@
     document.getElementById('bytes').textContent = estimate.bytes_human || '-';
     document.getElementById('project').textContent = project || '-';
     document.getElementById('location').textContent = location || '-';
+    renderFindings(estimate);
+    renderStatements(estimate);
+  }
+
+  function renderStatements(estimate) {
+    const statementsEl = document.getElementById('statements');
+    statementsEl.innerHTML = '';
+    const units = estimate.units || [];
+    (estimate.statements || []).forEach((statement) => {
+      const unit = units[statement.unit] || {};
+      const div = document.createElement('div');
+      let bytes = unit.error ? 'dry run failed' : unit.bytes_human;
+      if (unit.statements && unit.statements.length > 1) {
+        bytes += ` (with ${unit.statements.length - 1} dependent statements)`;
+      }
+      const warnings = (statement.findings || []).length;
+      div.className = unit.error ? 'statement error' : 'statement';
+      div.textContent = `#${statement.index + 1} L${statement.line + 1} ${statement.kind}: ${bytes}`
+        + (warnings ? ` (${warnings} findings)` : '');
+      div.addEventListener('click', () => selectFinding(statement));
+      statementsEl.appendChild(div);
+    });
+  }
+
+  function offsetOf(text, line, column) {
+    let offset = 0;
+    for (let current = 0; current < line; current += 1) {
+      const next = text.indexOf('\n', offset);
+      if (next < 0) {
+        return text.length;
+      }
+      offset = next + 1;
+    }
+    return Math.min(offset + column, text.length);
+  }
+
+  function selectFinding(finding) {
+    if (finding.line === null || finding.line === undefined) {
+      return;
+    }
+    const sqlInput = document.getElementById('sqlInput');
+    const text = sqlInput.value;
+    const start = offsetOf(text, finding.line, finding.column || 0);
+    const end = offsetOf(text, finding.end_line ?? finding.line, finding.end_column ?? (finding.column || 0) + 1);
+    sqlInput.focus();
+    sqlInput.setSelectionRange(start, end);
+  }
 
-    const warnCount = (estimate.findings || []).filter((f) => f.severity === 'WARN').length;
-    const errorCount = (estimate.findings || []).filter((f) => f.severity === 'ERROR').length;
+  function renderFindings(result) {
+    const warnCount = (result.findings || []).filter((f) => f.severity === 'WARN').length;
+    const errorCount = (result.findings || []).filter((f) => f.severity === 'ERROR').length;
     document.getElementById('warnCount').textContent = String(warnCount);
     document.getElementById('errorCount').textContent = String(errorCount);
 
     const findingsEl = document.getElementById('findings');
     findingsEl.innerHTML = '';
-    (estimate.findings || []).forEach((finding) => {
+    (result.findings || []).forEach((finding) => {
       const div = document.createElement('div');
       div.className = `finding ${finding.severity.toLowerCase()}`;
-      div.textContent = `[${finding.severity}] ${finding.code}: ${finding.message}`;
+      const where = finding.line === null || finding.line === undefined
+        ? ''
+        : ` (L${finding.line + 1}:${(finding.column || 0) + 1})`;
+      div.textContent = `[${finding.severity}] ${finding.code}: ${finding.message}${where}`;
+      div.addEventListener('click', () => selectFinding(finding));
       findingsEl.appendChild(div);
     });
 
     const summaryEl = document.getElementById('partitionSummary');
     summaryEl.innerHTML = '';
-    (estimate.partition_summary || []).forEach((row) => {
+    (result.partition_summary || []).forEach((row) => {
       const div = document.createElement('div');
       div.className = row.ok ? 'ok' : 'error';
       div.textContent = `${row.table}: ${row.ok ? 'OK' : 'NG'} (${(row.required_keys || []).join(', ')})`;
@@ -168,15 +250,16 @@
 
     const tablesEl = document.getElementById('tables');
     tablesEl.innerHTML = '';
-    (estimate.referenced_tables || []).forEach((table) => {
+    (result.referenced_tables || []).forEach((table) => {
       const li = document.createElement('li');
       li.textContent = table;
       tablesEl.appendChild(li);
     });
   }
 
-  function updateState(state) {
+  function updateState(state, queued) {
     document.getElementById('state').textContent = state;
+    document.getElementById('cancelQueued').classList.toggle('hidden', !queued);
   }
 
   function openReview() {
@@ -186,6 +269,19 @@
     if (latestEstimate) {
       details.textContent = `Bytes: ${latestEstimate.bytes_human} | Tables: ${(latestEstimate.referenced_tables || []).length}`;
     }
+    Object.entries(latestBudget || {}).forEach(([name, window]) => {
+      if (!window.limit) {
+        return;
+      }
+      const line = document.createElement('div');
+      line.textContent = `${name} budget: ${Math.round((window.used / window.limit) * 100)}% used`;
+      details.appendChild(line);
+    });
+    const reuseButton = document.getElementById('reuseButton');
+    reuseButton.classList.toggle('hidden', !latestReuse);
+    if (latestReuse) {
+      reuseButton.textContent = `Reuse result from ${new Date(latestReuse.executed_at).toLocaleTimeString()}`;
+    }
     document.getElementById('confirmText').textContent = `RUN ${latestHuman}`;
     document.getElementById('confirmInput').value = '';
     document.getElementById('executeButton').disabled = true;
@@ -211,6 +307,30 @@
     document.getElementById('exportModal').classList.add('hidden');
   }
 
+  function requestPage(startIndex, offset) {
+    vscode.postMessage({ type: 'fetchPage', startIndex, columnOffset: offset, columnCount: COLUMN_WINDOW });
+  }
+
+  function updatePage(page) {
+    const streamed = page.streamed_rows !== null && page.streamed_rows !== undefined;
+    const count = streamed ? page.streamed_rows : page.rows.length;
+    pageStart = page.start_index || 0;
+    pageSize = Math.max(pageSize, count);
+    nextStart = page.next_start_index ?? null;
+    columnOffset = page.column_offset || 0;
+    allColumns = page.all_columns || page.columns;
+    if (!streamed) {
+      renderTable('allTable', page);
+    } else if (count === 0) {
+      renderTable('allTable', { columns: page.columns, rows: [] });
+    }
+    const rows = count
+      ? `Rows ${pageStart + 1}-${pageStart + count}${page.total_rows !== null ? ` of ${page.total_rows}` : ''}`
+      : 'No rows';
+    const columns = `Columns ${columnOffset + 1}-${columnOffset + page.columns.length} of ${allColumns.length}`;
+    document.getElementById('pageInfo').textContent = `${rows} | ${columns}`;
+  }
+
   function renderTable(target, data) {
     const container = document.getElementById(target);
     container.innerHTML = '';
@@ -228,17 +348,33 @@
     thead.appendChild(headerRow);
     table.appendChild(thead);
     const tbody = document.createElement('tbody');
-    data.rows.forEach((row) => {
+    appendRows(tbody, data.rows);
+    table.appendChild(tbody);
+    container.appendChild(table);
+  }
+
+  function appendRows(tbody, rows) {
+    const fragment = document.createDocumentFragment();
+    rows.forEach((row) => {
       const tr = document.createElement('tr');
       row.forEach((cell) => {
         const td = document.createElement('td');
         td.textContent = cell === null || cell === undefined ? '' : String(cell);
         tr.appendChild(td);
       });
-      tbody.appendChild(tr);
+      fragment.appendChild(tr);
     });
-    table.appendChild(tbody);
-    container.appendChild(table);
+    tbody.appendChild(fragment);
+  }
+
+  function renderChunk(chunk, startIndex) {
+    const tbody = document.querySelector('#allTable tbody');
+    if (chunk.offset === startIndex || !tbody) {
+      renderTable('allTable', chunk);
+      document.getElementById('pageInfo').textContent = 'Loading...';
+      return;
+    }
+    appendRows(tbody, chunk.rows);
   }
 
   function appendLog(message, ts) {
@@ -254,23 +390,39 @@
       case 'estimate':
         updateEstimate(message.estimate, message.project, message.location);
         updateState(message.state || 'Idle');
+        latestReuse = message.reuse || null;
+        latestBudget = message.budget || null;
         if (message.review) {
           openReview();
         }
         break;
+      case 'lint':
+        renderFindings(message.lint);
+        break;
       case 'state':
         updateState(message.state);
         break;
       case 'preview':
         renderTable('previewTable', message.preview);
         break;
+      case 'pageChunk':
+        renderChunk(message.chunk, message.startIndex);
+        break;
       case 'page':
-        pageToken = message.page.page_token || null;
-        renderTable('allTable', message.page);
-        document.getElementById('pageInfo').textContent = pageToken ? 'More pages available' : 'End of pages';
+        updatePage(message.page);
+        break;
+      case 'queued':
+        updateState(
+          `Queued #${message.queue.position} (${Math.round(message.queue.waited_ms / 1000)}s, ` +
+            `${message.queue.running}/${message.queue.max_running} running)`,
+          true
+        );
         break;
       case 'execute':
-        appendLog(`Executed job ${message.execute.job_id}`, new Date().toISOString());
+        appendLog(
+          `${message.execute.status === 'REUSED' ? 'Reused' : 'Executed'} job ${message.execute.job_id}`,
+          new Date().toISOString()
+        );
         break;
       case 'log':
         appendLog(message.message, message.ts);
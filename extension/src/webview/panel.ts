@@ -4,6 +4,8 @@ import { PythonBridge } from '../pythonBridge';
 import { GuardStateMachine } from '../state';
 import { DiagnosticsManager } from '../diagnostics';
 
+const COLUMN_WINDOW = 50;
+
 export class GuardPanel {
   private panel: vscode.WebviewPanel;
   private bridge: PythonBridge;
@@ -13,6 +15,8 @@ export class GuardPanel {
   private latestEstimate: any = null;
   private latestRevision = 0;
   private config: any = null;
+  private queuedTicket: string | null = null;
+  private disposed = false;
 
   constructor(
     extensionUri: vscode.Uri,
@@ -95,6 +99,7 @@ export class GuardPanel {
       case 'sqlChanged':
         this.state.updateSql(message.sql || '');
         this.latestRevision = this.state.revision;
+        await this.runLint(this.state.currentSql, this.state.revision);
         return;
       case 'estimate':
         await this.runEstimate(this.state.currentSql, this.state.revision, false);
@@ -103,13 +108,20 @@ export class GuardPanel {
         await this.runEstimate(this.state.currentSql, this.state.revision, true);
         return;
       case 'execute':
-        await this.executeQuery();
+        await this.executeQuery(message.reuse || null);
+        return;
+      case 'cancelQueued':
+        await this.cancelQueued();
         return;
       case 'fetchPreview':
         await this.fetchPreview();
         return;
       case 'fetchPage':
-        await this.fetchPage(message.pageToken || null);
+        await this.fetchPage(
+          message.startIndex ?? 0,
+          message.columnOffset ?? 0,
+          message.columnCount ?? COLUMN_WINDOW
+        );
         return;
       case 'export':
         await this.exportResults(message.mode);
@@ -122,6 +134,15 @@ export class GuardPanel {
     }
   }
 
+  private async runLint(sql: string, revision: number): Promise<void> {
+    const response = await this.bridge.sendRequest({ op: 'lint', sql });
+    if (!response.ok || revision !== this.state.revision) {
+      return;
+    }
+    this.panel.webview.postMessage({ type: 'lint', lint: response.lint });
+    this.diagnostics.update(response.lint.findings || []);
+  }
+
   private async runEstimate(sql: string, revision: number, forReview: boolean): Promise<void> {
     if (!sql.trim()) {
       return;
@@ -139,6 +160,9 @@ export class GuardPanel {
       return;
     }
 
+    if (response.timings) {
+      this.log(`Estimate took ${response.timings.total_ms} ms ${JSON.stringify(response.timings.stages)}`);
+    }
     if (revision !== this.state.revision) {
       return;
     }
@@ -154,11 +178,13 @@ export class GuardPanel {
       location: response.location,
       state: this.state.state,
       review: forReview,
+      reuse: response.reuse,
+      budget: response.budget,
     });
     this.diagnostics.update(response.estimate.findings || []);
   }
 
-  private async executeQuery(): Promise<void> {
+  private async executeQuery(reuse: { job_id: string; location: string | null } | null): Promise<void> {
     const hasError = (this.latestEstimate?.findings || []).some((f: any) => f.severity === 'ERROR');
     if (!this.state.canExecute()) {
       this.log('Execute blocked: review required.');
@@ -170,14 +196,39 @@ export class GuardPanel {
     }
     this.state.setState('Executing');
     this.panel.webview.postMessage({ type: 'state', state: this.state.state });
-    const response = await this.bridge.sendRequest({ op: 'execute', sql: this.state.currentSql });
+    let response = await this.bridge.sendRequest({
+      op: 'execute',
+      sql: this.state.currentSql,
+      reuse_job_id: reuse?.job_id,
+      location: reuse?.location,
+    });
+    while (response.ok && response.execute.status === 'QUEUED' && !this.disposed) {
+      this.queuedTicket = response.execute.ticket;
+      this.panel.webview.postMessage({ type: 'queued', queue: response.execute.queue });
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      response = await this.bridge.sendRequest({
+        op: 'queue_status',
+        ticket: response.execute.ticket,
+        location: response.execute.location,
+      });
+    }
+    this.queuedTicket = null;
+    if (this.disposed) {
+      return;
+    }
+    if (response.ok && response.execute.status === 'CANCELLED') {
+      this.state.setState('Idle');
+      this.panel.webview.postMessage({ type: 'state', state: this.state.state });
+      this.log('Queued execution cancelled.');
+      return;
+    }
     if (!response.ok) {
       this.state.setState('Error');
       this.panel.webview.postMessage({ type: 'state', state: this.state.state, error: response.error });
       this.log(response.error?.detail || response.error?.message || 'Execute failed');
       return;
     }
-    this.state.setJob(response.execute.job_id);
+    this.state.setJob(response.execute.job_id, response.execute.location ?? null);
     this.state.setState('Idle');
     this.panel.webview.postMessage({
       type: 'execute',
@@ -187,11 +238,28 @@ export class GuardPanel {
     await this.fetchPreview();
   }
 
+  private async cancelQueued(): Promise<void> {
+    if (!this.queuedTicket) {
+      return;
+    }
+    // The polling loop in executeQuery picks up the CANCELLED state on its next tick.
+    const response = await this.bridge.sendRequest({ op: 'cancel_queued', ticket: this.queuedTicket });
+    if (!response.ok || !response.cancelled) {
+      this.log('Cancel failed: the query already started.');
+    }
+  }
+
   private async fetchPreview(): Promise<void> {
     if (!this.state.jobId) {
       return;
     }
-    const response = await this.bridge.sendRequest({ op: 'fetch_preview', job_id: this.state.jobId });
+    const response = await this.bridge.sendRequest({
+      op: 'fetch_preview',
+      job_id: this.state.jobId,
+      location: this.state.jobLocation,
+      column_offset: 0,
+      column_count: COLUMN_WINDOW,
+    });
     if (response.ok) {
       this.panel.webview.postMessage({ type: 'preview', preview: response.preview });
     } else {
@@ -199,15 +267,22 @@ export class GuardPanel {
     }
   }
 
-  private async fetchPage(pageToken: string | null): Promise<void> {
+  private async fetchPage(startIndex: number, columnOffset: number, columnCount: number): Promise<void> {
     if (!this.state.jobId) {
       return;
     }
-    const response = await this.bridge.sendRequest({
-      op: 'fetch_page',
-      job_id: this.state.jobId,
-      page_token: pageToken,
-    });
+    const response = await this.bridge.sendRequest(
+      {
+        op: 'fetch_page',
+        job_id: this.state.jobId,
+        location: this.state.jobLocation,
+        start_index: startIndex,
+        column_offset: columnOffset,
+        column_count: columnCount,
+        stream: true,
+      },
+      (chunk) => this.panel.webview.postMessage({ type: 'pageChunk', chunk, startIndex })
+    );
     if (response.ok) {
       this.panel.webview.postMessage({ type: 'page', page: response.page });
     } else {
@@ -228,6 +303,7 @@ export class GuardPanel {
     const response = await this.bridge.sendRequest({
       op: 'export',
       job_id: this.state.jobId,
+      location: this.state.jobLocation,
       mode,
       out_path: outPath,
     });
@@ -249,6 +325,10 @@ export class GuardPanel {
   }
 
   dispose(): void {
+    this.disposed = true;
+    if (this.queuedTicket) {
+      void this.bridge.sendRequest({ op: 'cancel_queued', ticket: this.queuedTicket }).catch(() => undefined);
+    }
     this.diagnostics.clear();
     this.panel.dispose();
   }
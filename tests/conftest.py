@@ -1,6 +1,53 @@
 import os
 import sys
 
+import pytest
+import yaml
+
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    """Drop process-wide clients, queues and memos so no test sees another test's fake backend."""
+    yield
+    from bq_guard import budget, cache, cli, payloads, scheduler
+    from bq_guard.bq import client
+    from bq_guard.policy.lint import LINTER
+
+    for thread in list(cli._refreshing.values()):
+        thread.join()
+    for store in list(payloads._stores.values()):
+        store.clear()
+    payloads._stores.clear()
+    client._clients.clear()
+    scheduler._scheduler = None
+    budget._ledgers.clear()
+    cache._shared.clear()
+    LINTER.clear()
+
+
+@pytest.fixture
+def fake_app(tmp_path, monkeypatch):
+    """Point config/cache/history at tmp_path and select the fake backend."""
+    for name in ("CONFIG", "CACHE", "STATE"):
+        monkeypatch.setenv(f"XDG_{name}_HOME", str(tmp_path / name.lower()))
+    config_dir = tmp_path / "config" / "bq_guard"
+    config_dir.mkdir(parents=True)
+
+    def configure(fake=None, backend=None, **app):
+        data = {
+            "default_project": "test-project",
+            "default_location": "US",
+            "backend": {"type": "fake", "fake": dict(fake or {}), **(backend or {})},
+            # Keep the host-wide execution slots out of /tmp so tests never wait on each other's jobs.
+            "scheduler": {"slot_dir": str(tmp_path / "slots")},
+        }
+        data.update(app)
+        (config_dir / "config.yaml").write_text(yaml.safe_dump({"app": data}), encoding="utf-8")
+        return tmp_path
+
+    configure()
+    return configure
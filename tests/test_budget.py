@@ -0,0 +1,25 @@
+from bq_guard.budget import RollingWindow
+from bq_guard.cli import handle_request
+
+SQL = "SELECT id FROM `p.d.events`"
+
+
+def test_rolling_window_expires_old_buckets():
+    window = RollingWindow(3600)
+    window.add(1000, 5)
+    window.add(1030, 7)
+    window.add(4000, 11)
+    assert window.used(4000) == 23
+    assert window.used(4700) == 11
+
+
+def test_review_blocks_once_hourly_budget_is_spent(fake_app):
+    fake_app({"tables": {"p.d.events": {"bytes": 400}}}, budget={"hourly_bytes": 1000})
+    first = handle_request({"op": "review", "sql": SQL})
+    assert first["budget"]["hourly"] == {"used": 0, "limit": 1000, "window_s": 3600}
+    assert handle_request({"op": "execute", "sql": SQL})["ok"]
+    assert handle_request({"op": "execute", "sql": SQL + " LIMIT 1"})["ok"]
+
+    second = handle_request({"op": "review", "sql": SQL})
+    assert second["budget"]["hourly"]["used"] == 800
+    assert [f["code"] for f in second["estimate"]["findings"] if f["severity"] == "ERROR"] == ["BUDGET_EXCEEDED"]
@@ -0,0 +1,78 @@
+import json
+import os
+
+from bq_guard import cli
+from bq_guard.bq.metadata import FRESHNESS_LABEL
+from bq_guard.cache import TableMetaCache
+from bq_guard.cli import handle_request
+from bq_guard.config import DEFAULT_CONFIG
+
+EVENTS = {
+    "p.d.events": {
+        "bytes": 3650,
+        "partition_type": "time",
+        "partition_key": "event_date",
+        "partitions": 365,
+    }
+}
+
+
+def test_cache_from_an_older_format_is_discarded(fake_app):
+    fake_app()
+    version = cli.ConfigLoader().load()["app"]["cache"]["schema_version"]
+    cache = TableMetaCache(version)
+    os.makedirs(os.path.dirname(cache.path), exist_ok=True)
+    with open(cache.path, "w", encoding="utf-8") as handle:
+        json.dump({"version": version, "tables": {"p.d.t": {"partition_type": "none"}}}, handle)
+    assert TableMetaCache(version).tables == {}
+    cache.set("p.d.t", {"partition_type": "none", "columns": []})
+    cache.save()
+    assert TableMetaCache(version).tables["p.d.t"]["columns"] == []
+
+
+def wait_for_freshness():
+    for thread in list(cli._refreshing.values()):
+        thread.join()
+
+
+def test_freshness_check_refetches_only_changed_tables(fake_app):
+    tables = {**EVENTS, "p.d.users": {"bytes": 10}}
+    fake_app({"tables": tables}, cache={"freshness_interval_s": 0})
+    sql = "SELECT id FROM `p.d.events` JOIN `p.d.users` USING (id) WHERE event_date = '2024-01-01'"
+    assert handle_request({"op": "estimate", "sql": sql})["ok"]
+    wait_for_freshness()
+    client = cli.get_client("test-project", cli.ConfigLoader().load()["app"]["backend"])
+    fetched = client.calls["get_table"]
+
+    client.table_specs["p.d.events"] = {"bytes": 3650, "partition_type": "range", "partition_key": "user_id"}
+    client.touch("p.d.events")
+    # The check runs in the background; this review still sees the cached verdict.
+    estimate = handle_request({"op": "estimate", "sql": sql})["estimate"]
+    assert "PARTITION_MISSING" not in {f["code"] for f in estimate["findings"]}
+    wait_for_freshness()
+    estimate = handle_request({"op": "estimate", "sql": sql})["estimate"]
+    wait_for_freshness()
+    assert "PARTITION_MISSING" in {f["code"] for f in estimate["findings"]}
+    assert client.calls["get_table"] - fetched == 1
+    meta = TableMetaCache(DEFAULT_CONFIG["app"]["cache"]["schema_version"]).tables
+    assert meta["p.d.events"]["partition_type"] == "range" and meta["p.d.users"]["partition_type"] == "none"
+
+
+def test_freshness_check_is_labeled_and_backs_off_on_failure(fake_app):
+    datasets = {"p.open": {"location": "US"}, "p.closed": {"location": "US", "tables_access": False}}
+    fake_app({"datasets": datasets})
+    sql = "SELECT id FROM `p.open.t` JOIN `p.closed.t` USING (id)"
+    for _ in range(2):
+        assert handle_request({"op": "estimate", "sql": sql})["ok"]
+        wait_for_freshness()
+    client = cli.get_client("test-project", cli.ConfigLoader().load()["app"]["backend"])
+    assert len(client.meta_queries) == 2
+    labels = {**DEFAULT_CONFIG["app"]["bq"]["labels"], **FRESHNESS_LABEL}
+    assert all(config.labels == labels for config in client.meta_queries)
+
+
+def test_disabled_freshness_check_sends_no_query(fake_app):
+    fake_app({"datasets": {"p.quiet": {"location": "US"}}}, cache={"freshness_check": False})
+    assert handle_request({"op": "estimate", "sql": "SELECT id FROM `p.quiet.t`"})["ok"]
+    client = cli.get_client("test-project", cli.ConfigLoader().load()["app"]["backend"])
+    assert client.meta_queries == [] and cli._refreshing == {}
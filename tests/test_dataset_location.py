@@ -0,0 +1,30 @@
+from bq_guard import cli
+from bq_guard.cache import TableMetaCache
+from bq_guard.cli import handle_request
+from bq_guard.config import DEFAULT_CONFIG
+
+
+def test_dataset_location_index_picks_location_before_dry_run(fake_app):
+    fake_app({"datasets": {"p.eu_sales": {"location": "EU"}}})
+    sql = "SELECT id FROM `p.eu_sales.orders`"
+    first = handle_request({"op": "estimate", "sql": sql})
+    assert first["ok"] and first["location"] == "EU"
+
+    executed = handle_request({"op": "execute", "sql": sql})["execute"]
+    assert executed["location"] == "EU"
+    page = handle_request({"op": "fetch_page", "job_id": executed["job_id"], "location": executed["location"]})
+    assert page["ok"]
+    assert TableMetaCache(DEFAULT_CONFIG["app"]["cache"]["schema_version"]).datasets["p.eu_sales"]["location"] == "EU"
+    mixed = handle_request({"op": "estimate", "sql": sql + " JOIN `p.us_sales.orders` USING (id)"})
+    assert mixed["ok"] is False and "location US" in mixed["error"]["detail"]
+
+
+def test_dataset_lookups_skip_struct_paths_and_remember_failures(fake_app):
+    fake_app({"error_rate": {"get_dataset": 1.0}, "error_code": 404})
+    sql = "SELECT t.payload.id FROM `p.d.t` t WHERE x = 'a.b.c'"
+    assert handle_request({"op": "estimate", "sql": sql})["ok"]
+    assert handle_request({"op": "estimate", "sql": sql})["ok"]
+    client = cli.get_client("test-project", cli.ConfigLoader().load()["app"]["backend"])
+    assert client.calls["get_dataset"] == 1
+    datasets = TableMetaCache(DEFAULT_CONFIG["app"]["cache"]["schema_version"]).datasets
+    assert list(datasets) == ["p.d"] and datasets["p.d"]["location"] is None
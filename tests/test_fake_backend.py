@@ -0,0 +1,51 @@
+import csv
+
+from bq_guard.cli import handle_request
+
+EVENTS = {
+    "p.d.events": {
+        "bytes": 3650,
+        "partition_type": "time",
+        "partition_key": "event_date",
+        "partitions": 365,
+    }
+}
+
+
+def test_estimate_uses_synthetic_table_sizes(fake_app):
+    fake_app({"tables": EVENTS})
+    unfiltered = handle_request({"op": "estimate", "sql": "SELECT id FROM `p.d.events`"})
+    assert unfiltered["ok"]
+    assert unfiltered["estimate"]["bytes_processed"] == 3650
+    codes = [f["code"] for f in unfiltered["estimate"]["findings"]]
+    assert "PARTITION_MISSING" in codes
+
+    filtered = handle_request(
+        {"op": "estimate", "sql": "SELECT id FROM `p.d.events` WHERE event_date = '2024-01-01'"}
+    )
+    assert filtered["estimate"]["bytes_processed"] == 10
+    assert filtered["estimate"]["partition_summary"][0]["ok"] is True
+
+
+def test_execute_page_and_export_round_trip(fake_app, tmp_path):
+    fake_app({"result_rows": 2500, "result_columns": 4}, page_size=1000)
+    job_id = handle_request({"op": "execute", "sql": "SELECT 1"})["execute"]["job_id"]
+
+    first = handle_request({"op": "fetch_page", "job_id": job_id})["page"]
+    assert first["columns"] == ["c0", "c1", "c2", "c3"]
+    assert len(first["rows"]) == 1000
+    second = handle_request({"op": "fetch_page", "job_id": job_id, "page_token": first["page_token"]})["page"]
+    assert second["rows"][0][0] == 1000
+
+    out_path = tmp_path / "out.csv"
+    exported = handle_request({"op": "export", "job_id": job_id, "mode": "all", "out_path": str(out_path)})
+    assert exported["export"]["rows"] == 2500
+    with open(out_path, newline="", encoding="utf-8") as handle:
+        assert sum(1 for _ in csv.reader(handle)) == 2501
+
+
+def test_error_injection_surfaces_as_dry_run_failure(fake_app):
+    fake_app({"error_rate": {"query": 1.0}, "error_code": 429})
+    response = handle_request({"op": "estimate", "sql": "SELECT 1 FROM `p.d.t`"})
+    assert response["ok"] is False
+    assert response["error"]["message"] == "Dry run failed."
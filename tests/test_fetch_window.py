@@ -0,0 +1,32 @@
+from bq_guard import cli
+from bq_guard.cli import handle_request
+
+
+def test_fetch_page_projects_columns_and_row_window(fake_app):
+    fake_app({"result_rows": 250, "result_columns": 40}, page_size=100)
+    job_id = handle_request({"op": "execute", "sql": "SELECT 1"})["execute"]["job_id"]
+
+    page = handle_request(
+        {"op": "fetch_page", "job_id": job_id, "start_index": 200, "column_offset": 30, "column_count": 4}
+    )["page"]
+    assert page["columns"] == ["c30", "c31", "c32", "c33"]
+    assert len(page["all_columns"]) == 40
+    assert len(page["rows"]) == 50 and page["rows"][0][2:] == [200, "c33-200"]
+    assert (page["next_start_index"], page["total_rows"]) == (None, 250)
+
+    preview = handle_request({"op": "fetch_preview", "job_id": job_id, "columns": ["c2", "c0"]})["preview"]
+    assert preview["columns"] == ["c2", "c0"] and preview["next_start_index"] == 50
+
+
+def test_window_fetch_waits_for_running_job_and_handles_scripts(fake_app):
+    fake_app({"job_duration_ms": 200, "result_rows": 30, "result_columns": 4})
+    job_id = handle_request({"op": "execute", "sql": "SELECT 1"})["execute"]["job_id"]
+    client = cli.get_client("test-project", cli.ConfigLoader().load()["app"]["backend"])
+    assert client.jobs[job_id].state == "RUNNING"
+    preview = handle_request({"op": "fetch_preview", "job_id": job_id, "column_offset": 0, "column_count": 2})
+    assert preview["ok"] and len(preview["preview"]["rows"]) == 30
+
+    script_id = handle_request({"op": "execute", "sql": "SELECT 1;\nSELECT 2"})["execute"]["job_id"]
+    page = handle_request({"op": "fetch_page", "job_id": script_id, "start_index": 10, "column_offset": 1})["page"]
+    assert page["columns"] == ["c1", "c2", "c3"] and page["start_index"] == 10 and len(page["rows"]) == 20
+    assert page["rows"][0][0] == "c1-10"
@@ -0,0 +1,19 @@
+import os
+
+from bq_guard import gcloud
+
+
+def test_values_are_reread_after_gcloud_config_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("CLOUDSDK_CONFIG", str(tmp_path))
+    (tmp_path / "configurations").mkdir()
+    config = tmp_path / "configurations" / "config_default"
+    config.write_text("[core]\nproject = a\n")
+    answers = iter(["a", "b"])
+    monkeypatch.setattr(gcloud, "_read_value", lambda key: next(answers))
+    monkeypatch.setattr(gcloud, "_values", {})
+
+    assert gcloud.get_default_project() == "a"
+    assert gcloud.get_default_project() == "a"
+    config.write_text("[core]\nproject = b\n")
+    os.utime(config, ns=(1, 1))
+    assert gcloud.get_default_project() == "b"
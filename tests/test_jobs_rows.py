@@ -0,0 +1,59 @@
+import csv
+import io
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+
+import pyarrow
+
+from bq_guard.bq.jobs import batch_to_rows, convert_column, write_csv_batches
+
+
+def _batch():
+    return pyarrow.RecordBatch.from_pydict(
+        {
+            "id": [1, None],
+            "score": [1.5, float("nan")],
+            "ts": pyarrow.array(
+                [datetime(2024, 1, 1, tzinfo=timezone.utc), None], pyarrow.timestamp("us", tz="UTC")
+            ),
+            "amount": pyarrow.array([Decimal("1.5"), None], pyarrow.decimal128(38, 9)),
+            "raw": [b"\x00\x01", None],
+            "tags": [["a", "b"], []],
+        }
+    )
+
+
+def test_batch_to_rows_converts_columns():
+    rows = batch_to_rows(_batch())
+    assert rows[0][0] == 1 and rows[1][0] is None
+    assert rows[0][1] == 1.5 and rows[1][1] is None
+    assert rows[0][2] == "2024-01-01 00:00:00+00:00" and rows[1][2] is None
+    assert rows[0][3] == "1.5"
+    assert rows[0][4] == "AAE=" and rows[1][4] is None
+    assert rows[0][5] == ["a", "b"]
+
+
+def test_write_csv_batches_counts_rows():
+    handle = io.StringIO()
+    total = write_csv_batches(csv.writer(handle), [_batch(), _batch().slice(0, 0)])
+    assert total == 2
+    lines = handle.getvalue().splitlines()
+    assert len(lines) == 2
+    assert lines[1].startswith(",,")
+
+
+def test_convert_column_keeps_python_string_forms():
+    columns = [
+        pyarrow.array(
+            [datetime(2024, 1, 1, 1, 2, 3, 450000, tzinfo=timezone.utc)], pyarrow.timestamp("us", tz="UTC")
+        ),
+        pyarrow.array([datetime(2024, 1, 1)], pyarrow.timestamp("us")),
+        pyarrow.array([time(1, 2, 3, 5)], pyarrow.time64("us")),
+        pyarrow.array([date(2024, 1, 1)], pyarrow.date32()),
+    ]
+    for column in columns:
+        assert convert_column(column) == [str(value) for value in column.to_pylist()]
+    amounts = pyarrow.array(
+        [Decimal("0"), Decimal("100"), Decimal("-0.000000001"), None], pyarrow.decimal128(38, 9)
+    )
+    assert convert_column(amounts) == ["0", "100", "-0.000000001", None]
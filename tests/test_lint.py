@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from bq_guard.config import DEFAULT_CONFIG
+from bq_guard.policy.lint import StatementLinter
+from bq_guard.policy.sql_sanitize import split_statements
+
+POLICY = DEFAULT_CONFIG["app"]["policy"]
+META = {"p.d.events": {"partition_type": "time", "partition_key": "event_date", "ingestion_time": False}}
+
+
+def test_split_ignores_semicolons_in_strings_and_comments():
+    sql = "SELECT ';' AS a -- trailing; comment\nFROM t; /* x; y */ SELECT \"b;\" # z;\n; SELECT `c;d`"
+    assert split_statements(sql) == [
+        "SELECT ';' AS a -- trailing; comment\nFROM t",
+        "/* x; y */ SELECT \"b;\" # z;",
+        "SELECT `c;d`",
+    ]
+
+
+def test_findings_carry_absolute_positions():
+    sql = "SELECT id FROM `p.d.events` WHERE event_date = '2024-01-01';\n  SELECT *\n  FROM `p.d.events`"
+    findings, tables, summary, statements = StatementLinter().lint(sql, POLICY, META, [], True)
+    assert statements == 2 and tables == ["p.d.events"]
+    by_code = {f.code: f for f in findings}
+    star = by_code["SELECT_STAR"]
+    assert (star.line, star.column, star.end_line, star.end_column) == (1, 2, 1, 10)
+    partition = by_code["PARTITION_MISSING"]
+    assert (partition.line, partition.column) == (2, 8)
+    assert by_code["MULTI_STATEMENT"].line == 1
+    assert [row["ok"] for row in summary] == [False]
+
+
+def test_unchanged_statements_hit_memo():
+    linter = StatementLinter()
+    first = "SELECT a FROM `p.d.events` WHERE event_date = '2024-01-01';\nSELECT b FROM `p.d.events`"
+    linter.lint(first, POLICY, META, [], True)
+    assert (linter.hits, linter.misses) == (0, 2)
+    findings, _, _, _ = linter.lint(first + " LIMIT 1", POLICY, META, [], True)
+    assert (linter.hits, linter.misses) == (1, 3)
+    assert [f.code for f in findings if f.code == "PARTITION_MISSING"]
+
+
+def test_metadata_change_rechecks_partitions_without_reparsing():
+    linter = StatementLinter()
+    sql = "SELECT a FROM `p.d.events`"
+    findings, _, _, _ = linter.lint(sql, POLICY, {}, [], True)
+    assert not findings
+    findings, _, _, _ = linter.lint(sql, POLICY, META, [], True)
+    assert [f.code for f in findings] == ["PARTITION_MISSING"]
+    assert linter.misses == 1
+
+
+def test_concurrent_lints_share_one_consistent_entry():
+    linter = StatementLinter()
+    sql = "SELECT a FROM `p.d.events`"
+    metas = [{}, META] * 50
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda meta: (meta, linter.lint(sql, POLICY, meta, [], True)[0]), metas))
+    for meta, findings in results:
+        assert [f.code for f in findings] == (["PARTITION_MISSING"] if meta else [])
+    assert linter.misses == 1 and linter.hits == len(metas) - 1
@@ -0,0 +1,25 @@
+import json
+
+from bq_guard import cli
+from bq_guard.cli import handle_request, serve_stream
+
+
+def test_adaptive_pages_stream_chunks_before_the_reply(fake_app):
+    paging = {"target_bytes": 64000, "chunk_bytes": 16000, "min_rows": 10, "max_rows": 100000}
+    fake_app({"result_rows": 5000, "result_columns": 40}, paging=paging)
+    job_id = handle_request({"op": "execute", "sql": "SELECT 1"})["execute"]["job_id"]
+
+    narrow = handle_request({"op": "fetch_page", "job_id": job_id, "column_count": 2})["page"]
+    wide = handle_request({"op": "fetch_page", "job_id": job_id, "column_count": 40})["page"]
+    assert (narrow["page_size"], wide["page_size"]) == (4000, 200)
+
+    lines = []
+    request = {"id": 7, "op": "fetch_page", "job_id": job_id, "column_count": 40, "stream": True}
+    serve_stream([json.dumps(request)], lines.append)
+    cli._executor.shutdown(wait=True)
+    cli._executor = None
+    messages = [json.loads(line) for line in lines]
+    chunks = [message["chunk"] for message in messages if "chunk" in message]
+    assert [chunk["offset"] for chunk in chunks] == [0, 50, 100, 150]
+    final = messages[-1]
+    assert final["ok"] and final["page"]["rows"] == [] and final["page"]["streamed_rows"] == 200
@@ -0,0 +1,63 @@
+import json
+import os
+
+from bq_guard.cli import handle_request
+from bq_guard.payloads import PayloadStore
+
+
+def read(handle):
+    with open(handle["path"], "rb") as stream:
+        stream.seek(handle["offset"])
+        return [json.loads(line) for line in stream.read(handle["length"]).splitlines()]
+
+
+def test_store_supersedes_releases_and_evicts(tmp_path):
+    store = PayloadStore(str(tmp_path), max_segments=2, grace_s=0)
+    first = store.put("a", b"[1]\n")
+    second = store.put("b", b"[2]\n")
+    assert read(first) == [[1]] and oct(os.stat(first["path"]).st_mode & 0o777) == "0o600"
+    assert store.supersede("a") == 1 and not os.path.exists(first["path"])
+    third, fourth = store.put("b", b"[3]\n"), store.put("b", b"[4]\n")
+    assert not os.path.exists(second["path"])
+    assert store.release(third["handle"]) and not store.release(third["handle"])
+    store.clear()
+    assert not os.path.exists(fourth["path"])
+
+
+def test_superseded_segments_outlive_in_flight_reads(tmp_path):
+    store = PayloadStore(str(tmp_path), max_segments=1)
+    first = store.put("a", b"[1]\n")
+    store.supersede("a")
+    second = store.put("a", b"[2]\n")
+    store.put("a", b"[3]\n")
+    assert read(first) == [[1]] and read(second) == [[2]]
+    assert store.release(first["handle"]) and not os.path.exists(first["path"])
+    store.clear()
+    assert os.listdir(tmp_path) == []
+
+
+def test_large_rows_travel_through_the_side_channel(fake_app, tmp_path, monkeypatch):
+    (tmp_path / "run").mkdir()
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "run"))
+    fake_app({"result_rows": 300, "result_columns": 3}, side_channel={"min_bytes": 4096}, preview_rows=20)
+    job_id = handle_request({"op": "execute", "sql": "SELECT 1"})["execute"]["job_id"]
+
+    small = handle_request({"op": "fetch_preview", "job_id": job_id, "side_channel": "w1"})["preview"]
+    assert len(small["rows"]) == 20 and small["rows_handle"] is None
+
+    chunks = []
+    page = handle_request(
+        {"op": "fetch_page", "job_id": job_id, "start_index": 0, "side_channel": "w1", "stream": True},
+        chunks.append,
+    )["page"]
+    assert page["streamed_rows"] == 300
+    assert sum(len(read(chunk["rows_handle"])) for chunk in chunks) == 300
+    assert all(chunk["rows"] == [] for chunk in chunks)
+
+    whole = handle_request({"op": "fetch_page", "job_id": job_id, "start_index": 0, "side_channel": "w1"})["page"]
+    assert whole["rows"] == [] and read(whole["rows_handle"])[299][0] == 299
+    assert whole["rows_handle"]["format"] == "ndjson"
+    for chunk in chunks:
+        assert handle_request({"op": "release_payload", "handle": chunk["rows_handle"]["handle"]})["released"]
+    assert handle_request({"op": "release_payload", "handle": whole["rows_handle"]["handle"]})["released"]
+    assert os.listdir(os.path.dirname(whole["rows_handle"]["path"])) == []
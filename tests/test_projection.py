@@ -0,0 +1,46 @@
+from bq_guard.cli import handle_request
+from bq_guard.policy.projection import advise_select_star
+
+
+def _sized(**widths):
+    return {"p.d.t": {"columns": [{"name": name, "type": "STRING", "bytes": size} for name, size in widths.items()]}}
+
+
+def _advice(sql, meta):
+    return [(f.evidence, f.message) for f in advise_select_star(sql, ["p.d.t"], meta)]
+
+
+def test_select_star_advice_suggests_projection_for_subquery():
+    meta = _sized(x=10, y=10, big=980)
+    [(evidence, message)] = _advice("SELECT x FROM (SELECT * FROM `p.d.t`)", meta)
+    assert evidence == "x" and "99%" in message
+
+
+def test_select_star_advice_skips_when_a_downstream_select_is_a_star():
+    meta = _sized(x=10, y=10, big=980)
+    assert _advice("WITH a AS (SELECT * FROM `p.d.t`) SELECT * FROM a WHERE y = 1", meta) == []
+    # The outer star still reports what it reads, but never a narrower projection.
+    [(evidence, message)] = _advice("SELECT * FROM (SELECT * FROM `p.d.t`) WHERE y = 1", meta)
+    assert evidence is None and "reads 3 columns" in message
+
+
+def test_select_star_advice_honors_except_and_replace():
+    meta = _sized(x=10, y=10, big=980)
+    [(_, message)] = _advice("SELECT * EXCEPT (big) FROM `p.d.t`", meta)
+    assert "reads 2 columns" in message and "big" not in message
+    [(evidence, message)] = _advice("SELECT x FROM (SELECT * EXCEPT(big) FROM `p.d.t`)", meta)
+    assert evidence == "x" and "(50% of the table)" in message
+    [(evidence, _)] = _advice("SELECT x FROM (SELECT * REPLACE (UPPER(y) AS x) FROM `p.d.t`)", meta)
+    assert evidence == "x, y"
+
+
+def test_select_star_advice_uses_cached_column_sizes(fake_app):
+    columns = {"id": "INT64", "payload": "STRING", "note": "STRING", "ts": "TIMESTAMP"}
+    fake_app({"tables": {"p.d.wide": {"bytes": 10000, "rows": 100, "columns": columns}}})
+    sql = "WITH x AS (SELECT * FROM `p.d.wide`) SELECT id, note FROM x"
+    estimate = handle_request({"op": "estimate", "sql": sql})["estimate"]
+    advice = [f for f in estimate["findings"] if f["code"] == "SELECT_STAR_COST"]
+    assert advice[0]["evidence"] == "id, note"
+    assert "saves ~4.9KB (50% of the table)" in advice[0]["message"]
+    lint = handle_request({"op": "lint", "sql": sql})["lint"]
+    assert [f["evidence"] for f in lint["findings"] if f["code"] == "SELECT_STAR_COST"] == ["id, note"]
@@ -0,0 +1,54 @@
+from bq_guard.bq.client import get_client
+from bq_guard.cli import handle_request
+from bq_guard.config import ConfigLoader
+from bq_guard.policy.sql_sanitize import canonical_sql
+
+SQL = "SELECT id FROM `p.d.orders` WHERE note = 'a  b'"
+
+
+def test_canonical_sql_keeps_literals():
+    assert canonical_sql("SELECT  id -- c\nFROM t WHERE x = 'a  b' ;") == "SELECT id FROM t WHERE x = 'a  b'"
+
+
+def test_review_offers_recent_identical_execution(fake_app):
+    fake_app()
+    assert handle_request({"op": "review", "sql": SQL})["reuse"] is None
+    executed = handle_request({"op": "execute", "sql": SQL})["execute"]
+
+    offer = handle_request({"op": "review", "sql": SQL.replace(" WHERE", "\n  WHERE")})["reuse"]
+    assert offer["job_id"] == executed["job_id"]
+    assert handle_request({"op": "review", "sql": SQL.replace("a  b", "a b")})["reuse"] is None
+
+    reused = handle_request({"op": "execute", "sql": SQL, "reuse_job_id": offer["job_id"]})["execute"]
+    assert reused == {
+        "job_id": executed["job_id"],
+        "status": "REUSED",
+        "location": executed["location"],
+        "ticket": None,
+        "queue": None,
+    }
+    assert handle_request({"op": "fetch_page", "job_id": reused["job_id"]})["ok"]
+
+
+def test_modified_source_table_invalidates_reuse(fake_app):
+    fake_app()
+    executed = handle_request({"op": "execute", "sql": SQL})["execute"]
+    config = ConfigLoader().load()
+    get_client("test-project", config["app"]["backend"]).touch("p.d.orders")
+    assert handle_request({"op": "review", "sql": SQL})["reuse"] is None
+    rerun = handle_request({"op": "execute", "sql": SQL, "reuse_job_id": executed["job_id"]})["execute"]
+    assert rerun["status"] == "EXECUTED" and rerun["job_id"] != executed["job_id"]
+
+
+def test_volatile_queries_and_external_tables_are_never_reused(fake_app):
+    fake_app({"tables": {"p.d.ext": {"type": "EXTERNAL"}}})
+    volatile = "SELECT id FROM `p.d.orders` WHERE ts > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 1 HOUR)"
+    for sql in (volatile, "SELECT id FROM `p.d.ext`"):
+        executed = handle_request({"op": "execute", "sql": sql})["execute"]
+        assert handle_request({"op": "review", "sql": sql})["reuse"] is None
+        rerun = handle_request({"op": "execute", "sql": sql, "reuse_job_id": executed["job_id"]})["execute"]
+        assert rerun["status"] == "EXECUTED"
+
+    quoted = "SELECT id FROM `p.d.orders` WHERE note = 'current_date()'"
+    handle_request({"op": "execute", "sql": quoted})
+    assert handle_request({"op": "review", "sql": quoted})["reuse"] is not None
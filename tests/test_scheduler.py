@@ -0,0 +1,83 @@
+import time
+
+from bq_guard.cli import handle_request
+from bq_guard.scheduler import ExecutionScheduler
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_small_and_priority_jobs_jump_the_queue(tmp_path):
+    scheduler = ExecutionScheduler(max_running=1, small_bytes=100, poll_s=0.01, slot_dir=str(tmp_path))
+    started, done = [], set()
+
+    def submit(name, size, priority=0):
+        def start():
+            started.append(name)
+            return {"job_id": name}
+
+        return scheduler.submit("p", size, priority, start, lambda result: result["job_id"] in done)
+
+    first = submit("a", 1000)
+    assert first.state == "RUNNING"
+    big, small, urgent = submit("b", 1000), submit("c", 10), submit("d", 5000, priority=1)
+    assert [scheduler.status(t.ticket_id)["position"] for t in (urgent, small, big)] == [1, 2, 3]
+    assert scheduler.cancel(big.ticket_id) and not scheduler.cancel(first.ticket_id)
+
+    done.add("a")
+    wait_for(lambda: started == ["a", "d"])
+    done.add("d")
+    wait_for(lambda: started == ["a", "d", "c"])
+    assert scheduler.snapshot() == {"p": {"queued": 0, "running": 1}}
+
+
+def test_cap_is_shared_with_other_schedulers_on_the_host(tmp_path):
+    done = set()
+    first = ExecutionScheduler(max_running=1, small_bytes=100, poll_s=0.01, slot_dir=str(tmp_path))
+    other = ExecutionScheduler(max_running=1, small_bytes=100, poll_s=0.01, slot_dir=str(tmp_path))
+    running = first.submit("p", 10, 0, lambda: {"job_id": "a"}, lambda result: result["job_id"] in done)
+    waiting = other.submit("p", 10, 0, lambda: {"job_id": "b"}, lambda result: result["job_id"] in done)
+    assert running.state == "RUNNING" and waiting.state == "QUEUED"
+    assert other.submit("q", 10, 0, lambda: {"job_id": "c"}, lambda result: True).state == "RUNNING"
+
+    done.add("a")
+    wait_for(lambda: waiting.state == "RUNNING")
+
+
+def test_execute_queues_until_a_slot_frees(fake_app, tmp_path):
+    scheduler = {"max_running_per_project": 1, "poll_s": 0.05, "slot_dir": str(tmp_path / "slots")}
+    fake_app({"job_duration_ms": 300}, scheduler=scheduler)
+    first = handle_request({"op": "execute", "sql": "SELECT 1"})["execute"]
+    assert first["status"] == "EXECUTED"
+    queued = handle_request({"op": "execute", "sql": "SELECT 2"})["execute"]
+    assert queued["status"] == "QUEUED" and queued["job_id"] is None and queued["queue"]["position"] == 1
+
+    def started():
+        status = handle_request({"op": "queue_status", "ticket": queued["ticket"]})["execute"]
+        return status if status["status"] == "EXECUTED" else None
+
+    wait_for(started)
+    assert started()["job_id"] not in (None, first["job_id"])
+    assert handle_request({"op": "fetch_preview", "job_id": started()["job_id"]})["ok"]
+
+
+def test_reviewed_small_queries_jump_ahead_with_budgets_off(fake_app, tmp_path):
+    tables = {"p.d.big": {"bytes": 10**12}, "p.d.small": {"bytes": 10}}
+    scheduler = {"max_running_per_project": 1, "poll_s": 0.05, "slot_dir": str(tmp_path / "slots")}
+    fake_app({"tables": tables, "job_duration_ms": 5000}, scheduler=scheduler, budget={"enabled": False})
+
+    def run(sql):
+        assert handle_request({"op": "review", "sql": sql})["ok"]
+        return handle_request({"op": "execute", "sql": sql})["execute"]
+
+    assert run("SELECT id FROM `p.d.big`")["status"] == "EXECUTED"
+    big = run("SELECT id FROM `p.d.big` WHERE id > 1")
+    small = run("SELECT id FROM `p.d.small`")
+    assert small["queue"]["position"] == 1
+    assert handle_request({"op": "queue_status", "ticket": big["ticket"]})["execute"]["queue"]["position"] == 2
+    for ticket in (big["ticket"], small["ticket"]):
+        assert handle_request({"op": "cancel_queued", "ticket": ticket})["cancelled"]
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from bq_guard import cli
+from bq_guard.cli import handle_request
+from bq_guard.policy.script import plan_script
+from bq_guard.policy.sql_sanitize import split_statement_spans
+
+SCRIPT = """DECLARE day DATE DEFAULT '2024-01-01';
+CREATE TEMP TABLE tmp AS SELECT id FROM `p.d.a`;
+SELECT id FROM `p.d.b` WHERE note = 'tmp; day';
+SELECT id FROM tmp;
+SELECT id FROM `p.d.c` WHERE event_date = day"""
+
+
+def test_plan_groups_statements_by_dependency():
+    plan = plan_script(SCRIPT, split_statement_spans(SCRIPT))
+    assert plan.kinds == ["variable", "ddl", "query", "query", "query"]
+    assert [unit.statements for unit in plan.units] == [[0, 4], [1, 3], [2]]
+    assert plan.units[1].sql == "CREATE TEMP TABLE tmp AS SELECT id FROM `p.d.a`;\nSELECT id FROM tmp"
+
+
+def test_procedural_script_is_a_single_unit():
+    sql = "DECLARE x INT64;\nIF x > 0 THEN SELECT 1; END IF"
+    plan = plan_script(sql, split_statement_spans(sql))
+    assert plan.procedural and [unit.sql for unit in plan.units] == [sql]
+
+
+def test_script_estimate_runs_units_concurrently(fake_app):
+    tables = {name: {"bytes": size} for name, size in [("p.d.a", 100), ("p.d.b", 20), ("p.d.c", 3)]}
+    fake_app({"tables": tables}, policy={"block_multi_statement": False}, cache={"freshness_check": False})
+    client = cli.get_client("test-project", cli.ConfigLoader().load()["app"]["backend"])
+    # Hold every dry run; a sequential runner would never have all three units in flight at once.
+    gate = client.hold("query")
+    responses = []
+    review = threading.Thread(target=lambda: responses.append(handle_request({"op": "review", "sql": SCRIPT})))
+    review.start()
+    deadline = time.monotonic() + 5
+    while client.in_flight.get("query") != 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    gate.set()
+    review.join()
+    assert client.peak_in_flight["query"] == 3 and client.calls["query"] == 3
+    estimate = responses[0]["estimate"]
+    assert estimate["bytes_processed"] == 123
+    assert [unit["bytes_processed"] for unit in estimate["units"]] == [3, 100, 20]
+    assert [row["bytes_processed"] for row in estimate["statements"]] == [None, None, 20, None, None]
+    assert estimate["statements"][4]["line"] == 4
+    assert {f["code"] for f in estimate["findings"]} >= {"MULTI_STATEMENT", "DDL_DML"}
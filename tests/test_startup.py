@@ -0,0 +1,46 @@
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+
+from bq_guard.cli import handle_request
+from bq_guard.config import ensure_private_dir
+
+
+def test_cli_import_defers_heavy_modules():
+    code = (
+        "import json, sys, bq_guard.cli; "
+        "print(json.dumps([m for m in ('google.cloud.bigquery', 'pyarrow', 'yaml', 'platformdirs') if m in sys.modules]))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert json.loads(output) == []
+
+
+def test_warmup_runs_in_background(fake_app):
+    fake_app({"latency_ms": {"query": 50}})
+    started = handle_request({"op": "warmup"})
+    assert started["ok"] and started["warm"]["state"] in {"warming", "warm"}
+    deadline = time.monotonic() + 5
+    state = None
+    while time.monotonic() < deadline:
+        state = handle_request({"op": "ping"})["warm"]["state"]
+        if state == "warm":
+            break
+        time.sleep(0.02)
+    assert state == "warm"
+    assert handle_request({"op": "warmup"})["started"] is False
+
+
+def test_runtime_dir_must_be_private_and_ours(tmp_path):
+    fresh = tmp_path / "fresh"
+    assert ensure_private_dir(str(fresh)) == str(fresh) and (fresh.stat().st_mode & 0o777) == 0o700
+    loose = tmp_path / "loose"
+    loose.mkdir(mode=0o755)
+    loose.chmod(0o755)
+    link = tmp_path / "link"
+    link.symlink_to(fresh)
+    for path in (loose, link):
+        with pytest.raises(PermissionError):
+            ensure_private_dir(str(path))
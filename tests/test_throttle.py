@@ -0,0 +1,88 @@
+import threading
+import time
+
+from google.api_core import exceptions as api_exceptions
+
+from bq_guard.bq.throttle import ApiGuard, SingleFlight, TokenBucket, is_retryable
+from bq_guard import cli
+from bq_guard.cli import handle_request
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait()
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: flight.waiting() == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+
+
+def test_token_bucket_waits_once_burst_is_spent():
+    now = [100.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=50, burst=2, clock=lambda: now[0], sleep=sleep)
+    assert bucket.acquire() == 0 and bucket.acquire() == 0
+    assert bucket.acquire() == sleeps[0] == 0.02
+    now[0] += 1
+    assert bucket.acquire() == 0 and len(sleeps) == 1
+
+
+def test_guard_retries_retryable_errors_with_backoff():
+    sleeps = []
+    guard = ApiGuard(retry={"attempts": 3, "base_ms": 100}, sleep=sleeps.append)
+    outcomes = [api_exceptions.TooManyRequests("slow down"), api_exceptions.ServiceUnavailable("x"), "ok"]
+
+    def call():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert guard.call("query", call) == "ok"
+    assert len(sleeps) == 2 and 0 <= sleeps[1] <= 0.2
+    assert guard.snapshot()["query"]["retried"] == 2
+    assert not is_retryable(api_exceptions.ServiceUnavailable("x"), idempotent=False)
+    assert not is_retryable(api_exceptions.BadRequest("bad sql"))
+
+
+def test_concurrent_identical_dry_runs_are_coalesced(fake_app):
+    fake_app(backend={"retry": {"attempts": 1}}, cache={"freshness_check": False})
+    client = cli.get_client("test-project", cli.ConfigLoader().load()["app"]["backend"])
+    gate = client.hold("query")
+    sql = "SELECT id FROM `p.d.coalesce`"
+    threads = [threading.Thread(target=handle_request, args=({"op": "estimate", "sql": sql},)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: client.in_flight.get("query") == 1 and client.guard._flight.waiting() == 3)
+    gate.set()
+    for thread in threads:
+        thread.join()
+    assert client.calls["query"] == 1
+    assert handle_request({"op": "metrics"})["api"]["query"] == {
+        "calls": 1, "coalesced": 3, "throttled": 0, "retried": 0, "failed": 0
+    }
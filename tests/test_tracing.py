@@ -0,0 +1,60 @@
+import json
+
+from bq_guard.tracing import OpStats, span, start_trace
+
+
+def test_spans_nest_and_sum_by_stage():
+    with start_trace("estimate") as tracer:
+        with span("dry_run"):
+            with span("client"):
+                pass
+        with span("history"):
+            pass
+        with span("history"):
+            pass
+    timings = tracer.timings()
+    assert set(timings["stages"]) == {"dry_run", "client", "history"}
+    client = next(item for item in tracer.spans if item.name == "client")
+    dry_run = next(item for item in tracer.spans if item.name == "dry_run")
+    assert client.parent_id == dry_run.span_id
+    assert timings["total_ms"] >= timings["stages"]["dry_run"]
+
+
+def test_span_without_trace_is_noop():
+    with span("orphan") as item:
+        assert item is None
+
+
+def test_op_stats_percentiles_use_rolling_window():
+    stats = OpStats(window=10)
+    for value in range(100):
+        stats.record("estimate", float(value))
+    snapshot = stats.snapshot()["estimate"]
+    assert snapshot["count"] == 10
+    assert snapshot["p50_ms"] in {94.0, 95.0}
+    assert snapshot["p95_ms"] == 99.0
+
+
+def test_export_writes_one_otlp_request_per_trace(tmp_path):
+    with start_trace("estimate") as tracer:
+        with span("metadata", table="p.d.t", rows=3):
+            pass
+        try:
+            with span("dry_run"):
+                raise ValueError("boom")
+        except ValueError:
+            pass
+    path = tmp_path / "trace.jsonl"
+    tracer.export(str(path))
+    [line] = path.read_text().splitlines()
+    [resource_spans] = json.loads(line)["resourceSpans"]
+    [scope_spans] = resource_spans["scopeSpans"]
+    root, metadata, dry_run = scope_spans["spans"]
+    assert "parentSpanId" not in root and metadata["parentSpanId"] == root["spanId"]
+    assert metadata["kind"] == 1 and metadata["status"] == {"code": 1}
+    assert metadata["attributes"] == [
+        {"key": "table", "value": {"stringValue": "p.d.t"}},
+        {"key": "rows", "value": {"intValue": "3"}},
+    ]
+    assert dry_run["status"] == {"code": 2, "message": "boom"}
+    assert int(root["endTimeUnixNano"]) >= int(root["startTimeUnixNano"])